@@ -1,48 +1,244 @@
 # compare_planners.py
 import time
 import os
-from sat_encoding import encode_sat_plan
-from sat_planner import plan_sat
-from search_planner import plan_bfs, State
-from visualize_sat import visualize_path_sat
-from visualize_bfs import visualize_path_bfs
-from real_search_tree_visualizer import visualize_real_bfs_tree
+import hashlib
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import sat_encoding
+import sat_smt2
+from sat_encoding import load_sat_plan
+from sat_smt2 import write_smt2_plan
+from sat_planner import plan_sat, IncrementalPlanner
+from sat_cnf import plan_sat_cnf
+from search_planner import plan_bfs, plan_bfs_seeded, plan_iddfs
+
+def load_map_array(filename):
+    """
+    Read a map file into a (rows, cols) uint8 array of character codes.
+    All rows must have the same width; a ragged row raises ValueError naming it.
+    """
+    with open(filename, 'rb') as f:
+        buf = f.read().replace(b'\r', b'').rstrip(b'\n') + b'\n'
+    width = buf.index(b'\n')
+    flat = np.frombuffer(buf, dtype=np.uint8)
+    if len(flat) % (width + 1) == 0:
+        arr = flat.reshape(-1, width + 1)
+        if (arr[:, width] == ord('\n')).all():
+            return arr[:, :width]   # drop the newline column
+
+    # Some row is a different width: name it instead of failing in reshape
+    for i, line in enumerate(buf.split(b'\n')[:-1]):
+        if len(line) != width:
+            raise ValueError(f"{filename}: row {i + 1} is {len(line)} cells wide, "
+                             f"expected {width} like row 1")
+
+def grid_to_lists(arr):
+    """Legacy list-of-lists-of-chars view of a map array, for the planners and visualizers."""
+    return [list(row.tobytes().decode()) for row in arr]
 
 def load_map(filename):
-    with open(filename, 'r') as f:
-        return [list(line.rstrip('\n')) for line in f]
-
-def find_positions(grid):
-    start = goal = None
-    obstacles = []
-    boxes = []
-
-    for r in range(len(grid)):
-        for c in range(len(grid[0])):
-            ch = grid[r][c]
-            if ch == 'S':
-                start = (r, c)
-            elif ch == 'G':
-                goal = (r, c)
-            elif ch == '#':
-                obstacles.append((r, c))
-            elif ch == 'B':
-                boxes.append((r, c))
-
-    if not start:
-        start = (0, 0)
-    if not goal:
-        goal = (0, 0)
-    return start, goal, obstacles, boxes
-
-def compare_planners(map_file, max_t=20):
+    return grid_to_lists(load_map_array(filename))
+
+# Byte -> cell class lookup table used by _scan
+_EMPTY, _START, _GOAL, _WALL, _BOX = range(5)
+_CELL_CLASS = np.zeros(256, dtype=np.uint8)
+for _ch, _cls in (('S', _START), ('G', _GOAL), ('#', _WALL), ('B', _BOX)):
+    _CELL_CLASS[ord(_ch)] = _cls
+
+def _scan(arr):
+    """
+    Classify every cell in a single table-lookup pass over the map array.
+    Returns the (rows, cols) class array and, for the non-empty cells in
+    row-major order, their coordinates and classes.
+    """
+    cls = _CELL_CLASS[arr]
+    flat_idx = np.flatnonzero(cls)
+    coords = np.stack(np.unravel_index(flat_idx, arr.shape), axis=1)
+    return cls, coords, cls.ravel()[flat_idx]
+
+def find_positions(arr):
+    """
+    Locate start, goal, obstacles and boxes in a uint8 map array.
+    obstacle_bits[r] is an int bitmask with bit c set iff (r, c) is a wall.
+    """
+    cls, coords, kinds = _scan(arr)
+
+    def cells(kind):
+        return list(map(tuple, coords[kinds == kind].tolist()))
+
+    starts, goals = cells(_START), cells(_GOAL)
+    start = starts[0] if starts else (0, 0)
+    goal = goals[0] if goals else (0, 0)
+    obstacles = cells(_WALL)
+    boxes = cells(_BOX)
+    obstacle_bits = [int.from_bytes(np.packbits(row, bitorder='little').tobytes(), 'little')
+                     for row in (cls == _WALL)]
+
+    return start, goal, obstacles, boxes, obstacle_bits
+
+def save_path(filename, robot_path):
+    """Write the path as [(r, c), ...], streamed tuple by tuple instead of via str(list)."""
+    with open(filename, 'w', buffering=1 << 16) as f:
+        f.write('[')
+        for i, (r, c) in enumerate(robot_path):
+            f.write(f"{', ' if i else ''}({r}, {c})")
+        f.write(']')
+
+SAT_CACHE_DIR = ".sat_cache"
+
+def sat_cache_path(grid, start, goal, boxes, obstacles, t):
+    """Cache file for one horizon's encoding, keyed by the map, the horizon and the encoder source."""
+    h = hashlib.blake2b(digest_size=16)
+    for module in (sat_encoding, sat_smt2):
+        with open(module.__file__, 'rb') as f:
+            h.update(f.read())  # any change to the encoder invalidates old entries
+    h.update("\n".join("".join(row) for row in grid).encode())
+    h.update(repr((start, goal, tuple(sorted(obstacles)), tuple(boxes), t)).encode())
+    return os.path.join(SAT_CACHE_DIR, f"{h.hexdigest()}.smt2")
+
+def cached_encode_sat_plan(grid, start, goal, boxes, obstacles, t):
+    """Encode horizon t, reusing the encoding saved by an earlier run when available."""
+    path = sat_cache_path(grid, start, goal, boxes, obstacles, t)
+    if os.path.exists(path):
+        return load_sat_plan(path, grid, len(boxes), t)
+
+    # Written as SMT-LIB2 text and parsed once, instead of building z3 ASTs
+    # from Python and dumping them with to_smt2()
+    os.makedirs(SAT_CACHE_DIR, exist_ok=True)
+    write_smt2_plan(grid, start, goal, boxes, obstacles, t).write(path)
+    return load_sat_plan(path, grid, len(boxes), t)
+
+# Map data shared by every task in a worker process, set once by _init_sat_worker
+_worker_map = None
+
+def _init_sat_worker(grid, start, goal, boxes, obstacles):
+    global _worker_map
+    _worker_map = (grid, start, goal, boxes, obstacles)
+
+def solve_horizon(t, grid, start, goal, boxes, obstacles):
+    """Encode and solve the SAT plan for a single horizon t."""
+    solver, RobotAt, BoxAt = cached_encode_sat_plan(grid, start, goal, boxes, obstacles, t)
+    return plan_sat(solver, RobotAt, BoxAt, t, (len(grid), len(grid[0])), len(boxes), grid)
+
+def sat_worker(t):
+    """
+    Portfolio task: solve horizon t on the map stashed by _init_sat_worker,
+    so only the horizon has to be pickled per task.
+    """
+    return solve_horizon(t, *_worker_map)
+
+def _worker_processes(ex):
+    """
+    The executor's live worker processes, or [] if they can't be found.
+    ProcessPoolExecutor has no public handle on its workers; _processes is a
+    CPython implementation detail, so this is the only place that touches it
+    and anything unexpected just leaves the workers to finish on their own.
+    """
+    processes = getattr(ex, '_processes', None)
+    if not isinstance(processes, dict):
+        return []
+    return [p for p in processes.values() if hasattr(p, 'terminate')]
+
+def _shutdown_now(ex):
+    # Drop queued tasks. A running task is stuck inside solver.check() or a
+    # BFS loop and never returns to Python to look at a cancellation flag, so
+    # its worker process has to be terminated instead
+    processes = _worker_processes(ex)
+    ex.shutdown(wait=False, cancel_futures=True)
+    for p in processes:
+        p.terminate()
+
+def sat_portfolio(grid, start, goal, boxes, obstacles, max_t):
+    """
+    Solve horizons t=1..max_t-1 concurrently and return (t, sat_result) for the
+    smallest satisfiable horizon, or (-1, None) if none is satisfiable.
+    """
+    horizons = list(range(1, max_t))
+    if not horizons:
+        return -1, None
+
+    best_t, best_result = -1, None
+    ex = ProcessPoolExecutor(max_workers=min(os.cpu_count() or 1, len(horizons)),
+                             initializer=_init_sat_worker,
+                             initargs=(grid, start, goal, boxes, obstacles))
+    try:
+        futures = {ex.submit(sat_worker, t): t for t in horizons}
+        pending = set(horizons)
+        for fut in as_completed(futures):
+            t = futures[fut]
+            pending.discard(t)
+            sat_result = fut.result()
+            print(f"Horizon t={t}: {'SAT' if sat_result else 'UNSAT'}")
+
+            if sat_result and (best_t < 0 or t < best_t):
+                best_t, best_result = t, sat_result
+
+            # Shortest horizon wins: stop once no smaller horizon is still pending
+            if best_t >= 0 and all(p > best_t for p in pending):
+                break
+    finally:
+        _shutdown_now(ex)
+
+    return best_t, best_result
+
+def sat_incremental(grid, start, goal, boxes, obstacles, max_t):
+    """
+    Solve horizons t=1..max_t-1 in order on a single solver kept alive across
+    horizons. Each step only adds the new timestep, and the goal is passed as an
+    assumption so nothing has to be popped and learned clauses are kept.
+    Returns (t, sat_result) for the smallest satisfiable horizon, or (-1, None).
+    """
+    return IncrementalPlanner(grid, start, goal, boxes, obstacles).search(max_t)
+
+def sat_cnf(grid, start, goal, boxes, obstacles, max_t):
+    """
+    Solve horizons t=1..max_t-1 in order, each encoded straight to DIMACS CNF.
+    Returns (t, sat_result) for the smallest satisfiable horizon, or (-1, None).
+    """
+    for t in range(1, max_t):
+        print(f"Trying SAT (CNF) with horizon t={t}...")
+        sat_result = plan_sat_cnf(grid, start, goal, boxes, t)
+        if sat_result:
+            return t, sat_result
+    return -1, None
+
+def bfs_portfolio(grid, start, goal, boxes, obstacles, max_depth, obstacle_bits, num_workers):
+    """
+    Run BFS in num_workers processes, each with a differently seeded move order,
+    and return (seed, bfs_result) for the first search that finds a solution.
+    """
+    ex = ProcessPoolExecutor(max_workers=num_workers)
+    try:
+        futures = {ex.submit(plan_bfs_seeded, grid, start, goal, boxes, obstacles,
+                             max_depth, obstacle_bits, seed): seed
+                   for seed in range(num_workers)}
+        for fut in as_completed(futures):
+            bfs_result = fut.result()
+            if bfs_result:
+                return futures[fut], bfs_result
+    finally:
+        _shutdown_now(ex)
+    return None, None
+
+def compare_planners(map_file, max_t=20, sat_strategy="incremental", bfs_workers=1,
+                     search_strategy="bfs"):
     """
     Compare SAT-based planner and BFS search on the given map
     Run BFS first, then SAT, then compare results
+
+    sat_strategy: "incremental" reuses one solver across horizons,
+                  "portfolio" solves every horizon concurrently in worker processes,
+                  "cnf" encodes each horizon as DIMACS clauses without z3 ASTs
+    bfs_workers:  number of seeded BFS searches to race in worker processes;
+                  the default 1 runs BFS in-process in the default move order
+    search_strategy: "bfs" (above) or "iddfs", iterative deepening with a
+                  transposition table; it keeps no BFS queue or State per
+                  visited state, but the table is still one entry per state
     """
     # Load the map
-    grid = load_map(map_file)
-    start, goal, obstacles, boxes = find_positions(grid)
+    grid_arr = load_map_array(map_file)
+    grid = grid_to_lists(grid_arr)
+    start, goal, obstacles, boxes, obstacle_bits = find_positions(grid_arr)
     
     print(f"Map: {map_file}")
     print(f"Grid size: {len(grid)}x{len(grid[0])}")
@@ -57,7 +253,17 @@ def compare_planners(map_file, max_t=20):
     # Run BFS search first
     print("\n===== BFS Search =====")
     bfs_start_time = time.time()
-    bfs_result = plan_bfs(grid, start, goal, boxes, obstacles, max_depth=max_t)
+    if search_strategy == "iddfs":
+        bfs_seed = None
+        bfs_result = plan_iddfs(grid, start, goal, boxes, obstacles, max_depth=max_t,
+                                obstacle_bits=obstacle_bits)
+    elif bfs_workers > 1:
+        bfs_seed, bfs_result = bfs_portfolio(grid, start, goal, boxes, obstacles, max_t,
+                                             obstacle_bits, bfs_workers)
+    else:
+        bfs_seed = None
+        bfs_result = plan_bfs(grid, start, goal, boxes, obstacles, max_depth=max_t,
+                              obstacle_bits=obstacle_bits)
     bfs_time = time.time() - bfs_start_time
     
     if bfs_result:
@@ -66,13 +272,15 @@ def compare_planners(map_file, max_t=20):
             robot_path, box_paths, nodes_expanded, all_states = bfs_result
             # Find the goal state by tracing back from the last position
             goal_state = None
-            for state_hash, state in all_states.items():
+            for state in all_states.values():
                 if state.robot_pos == goal and state.depth == len(robot_path) - 1:
                     goal_state = state
                     break
             
             # If we found the goal state, visualize the real BFS tree
             if goal_state:
+                # Imported lazily: pulls in networkx and matplotlib
+                from real_search_tree_visualizer import visualize_real_bfs_tree
                 visualize_real_bfs_tree(all_states, goal_state, grid)
                 print(f"Real BFS tree visualization created with {len(all_states)} actual nodes")
         else:
@@ -90,14 +298,15 @@ def compare_planners(map_file, max_t=20):
         results['bfs']['time'] = bfs_time
         results['bfs']['path_length'] = len(robot_path)
         results['bfs']['nodes'] = nodes_expanded
+        results['bfs']['seed'] = bfs_seed
         
         # Visualize
+        from visualize_bfs import visualize_path_bfs
         visualize_path_bfs(grid, robot_path, box_paths)
         print("BFS solution saved as path.png and path.gif")
         
         # Save path
-        with open("bfs_path.txt", "w") as f:
-            f.write(str(robot_path))
+        save_path("bfs_path.txt", robot_path)
     else:
         print("BFS search failed to find a solution")
         results['bfs']['time'] = bfs_time
@@ -108,36 +317,35 @@ def compare_planners(map_file, max_t=20):
     sat_start_time = time.time()
     sat_horizon = -1
     
-    for t in range(1, max_t):
-        print(f"Trying SAT with horizon t={t}...")
-        solver, RobotAt, BoxAt = encode_sat_plan(grid, start, goal, boxes, obstacles, t)
-        sat_result = plan_sat(solver, RobotAt, BoxAt, t, (len(grid), len(grid[0])), len(boxes), grid)
-        
-        if sat_result:
-            robot_path, box_paths = sat_result
-            sat_time = time.time() - sat_start_time
-            sat_horizon = t
-            
-            print(f"SAT solution found at horizon {t}")
-            print(f"Path length: {len(robot_path)}")
-            print(f"Time taken: {sat_time:.8f} seconds")
-            
-            # Save results
-            results['sat']['solved'] = True
-            results['sat']['time'] = sat_time
-            results['sat']['path_length'] = len(robot_path)
-            
-            # Visualize
-            visualize_path_sat(grid, robot_path, box_paths)
-            print("SAT solution saved as path.png and path.gif")
-            
-            # Save path
-            with open("sat_path.txt", "w") as f:
-                f.write(str(robot_path))
-            
-            break
+    if sat_strategy == "portfolio":
+        print(f"Trying SAT with horizons t=1..{max_t - 1} in parallel...")
+        sat_horizon, sat_result = sat_portfolio(grid, start, goal, boxes, obstacles, max_t)
+    elif sat_strategy == "cnf":
+        sat_horizon, sat_result = sat_cnf(grid, start, goal, boxes, obstacles, max_t)
+    else:
+        sat_horizon, sat_result = sat_incremental(grid, start, goal, boxes, obstacles, max_t)
+    sat_time = time.time() - sat_start_time
+
+    if sat_result:
+        robot_path, box_paths = sat_result
+
+        print(f"SAT solution found at horizon {sat_horizon}")
+        print(f"Path length: {len(robot_path)}")
+        print(f"Time taken: {sat_time:.8f} seconds")
+
+        # Save results
+        results['sat']['solved'] = True
+        results['sat']['time'] = sat_time
+        results['sat']['path_length'] = len(robot_path)
+
+        # Visualize
+        from visualize_sat import visualize_path_sat
+        visualize_path_sat(grid, robot_path, box_paths)
+        print("SAT solution saved as path.png and path.gif")
+
+        # Save path
+        save_path("sat_path.txt", robot_path)
     else:
-        sat_time = time.time() - sat_start_time
         print(f"SAT planner failed to find solution within {max_t} steps")
         results['sat']['time'] = sat_time
     
@@ -178,6 +386,7 @@ def compare_planners(map_file, max_t=20):
 if __name__ == "__main__":
     import sys
     import os
+    from sat_encoding import enable_parallel
     
     # Get the path to the 'maps' directory one level up from 'src'
     current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -187,12 +396,18 @@ if __name__ == "__main__":
     # Set default map path and handle command line arguments
     default_map = os.path.join(maps_dir, "icepath.txt")
     
+    # --parallel opts in to Z3's multi-threaded mode; it is process-wide and rarely
+    # pays off on this finite-domain encoding, so it is off by default
+    args = [a for a in sys.argv[1:] if a != "--parallel"]
+    if len(args) < len(sys.argv) - 1:
+        enable_parallel()
+
     # If user provided a map path without full path, assume it's relative to maps_dir
-    map_file = sys.argv[1] if len(sys.argv) > 1 else default_map
-    if len(sys.argv) > 1 and not os.path.isabs(map_file) and not map_file.startswith('../'):
+    map_file = args[0] if len(args) > 0 else default_map
+    if len(args) > 0 and not os.path.isabs(map_file) and not map_file.startswith('../'):
         map_file = os.path.join(maps_dir, map_file)
         
-    max_t = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    max_t = int(args[1]) if len(args) > 1 else 20
     
     print(f"Using map file: {map_file}")
     compare_planners(map_file, max_t)
\ No newline at end of file
@@ -3,6 +3,7 @@ from compare_planners import compare_planners
 if __name__ == "__main__":
     import sys
     import os
+    from sat_encoding import enable_parallel
     
     # Get the path to the 'maps' directory one level up from 'src'
     current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -12,12 +13,18 @@ if __name__ == "__main__":
     # Set default map path and handle command line arguments
     default_map = os.path.join(maps_dir, "scene2.txt")
     
+    # --parallel opts in to Z3's multi-threaded mode; it is process-wide and rarely
+    # pays off on this finite-domain encoding, so it is off by default
+    args = [a for a in sys.argv[1:] if a != "--parallel"]
+    if len(args) < len(sys.argv) - 1:
+        enable_parallel()
+
     # If user provided a map path without full path, assume it's relative to maps_dir
-    map_file = sys.argv[1] if len(sys.argv) > 1 else default_map
-    if len(sys.argv) > 1 and not os.path.isabs(map_file) and not map_file.startswith('../'):
+    map_file = args[0] if len(args) > 0 else default_map
+    if len(args) > 0 and not os.path.isabs(map_file) and not map_file.startswith('../'):
         map_file = os.path.join(maps_dir, map_file)
         
-    max_t = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    max_t = int(args[1]) if len(args) > 1 else 20
     
     print(f"Using map file: {map_file}")
     compare_planners(map_file, max_t)
\ No newline at end of file
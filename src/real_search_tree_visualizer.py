@@ -1,83 +1,73 @@
 # real_search_tree_visualizer.py
 import networkx as nx
 import matplotlib.pyplot as plt
+import numpy as np
+from matplotlib.collections import LineCollection
 import os
 
-def visualize_real_bfs_tree(all_states, goal_state, grid):
-   
-    print(f"Building visualization for {len(all_states)} actual BFS states...")
-    
-    # Create a directed graph
-    G = nx.DiGraph()
-    
-    # Add all nodes to the graph
-    for state_hash, state in all_states.items():
-        # Create a unique node ID based on the hash
-        node_id = f"node_{state_hash}"
-        
-        # Determine if this state is in the solution path
-        in_solution = False
-        
-        # Add node with attributes
-        G.add_node(node_id, 
-                  pos=state.robot_pos, 
-                  boxes=state.boxes, 
-                  depth=state.depth,
-                  in_solution=in_solution)
-    
-    # Add edges based on parent relationships
-    for state_hash, state in all_states.items():
-        if state.parent:
-            parent_hash = hash(state.parent)
-            if parent_hash in all_states:  # Make sure the parent is in our set
-                G.add_edge(f"node_{parent_hash}", f"node_{state_hash}")
-    
-    # Now mark the solution path
-    # Trace back from goal to start
-    solution_path = []
-    current = goal_state
-    while current:
-        solution_path.append(current)
-        current = current.parent
-    solution_path.reverse()
-    
-    # Mark solution path nodes
-    for state in solution_path:
-        state_hash = hash(state)
-        node_id = f"node_{state_hash}"
-        if node_id in G.nodes:
-            G.nodes[node_id]['in_solution'] = True
-    
-    print(f"Created graph with {len(G.nodes())} nodes and {len(G.edges())} edges")
-    
+# Above this many states only the simplified tree is drawn
+FULL_TREE_MAX_NODES = 2000
+# At most this many non-solution nodes are drawn in the full tree (uniform sample)
+FULL_TREE_SAMPLE_NODES = 1000
+
+def tree_layout(G):
+    """
+    Tidy layered layout for a forest: leaves are spaced evenly in DFS order,
+    each parent is centred over its children and y is minus the depth.
+    """
+    pos = {}
+    next_x = 0
+    roots = [n for n in G.nodes() if G.in_degree(n) == 0]
+    for root in roots:
+        # Iterative post-order walk so deep trees don't hit the recursion limit
+        stack = [(root, 0, False)]
+        while stack:
+            node, depth, expanded = stack.pop()
+            children = list(G.successors(node))
+            if not children:
+                pos[node] = (next_x, -depth)
+                next_x += 1
+            elif expanded:
+                pos[node] = (sum(pos[c][0] for c in children) / len(children), -depth)
+            else:
+                stack.append((node, depth, True))
+                stack.extend((c, depth + 1, False) for c in reversed(children))
+    return pos
+
+def draw_full_tree(G, pos, num_states):
+    """Draw every node of the search tree and save actual_bfs_tree.png."""
     # Increase figure size for more nodes
     plt.figure(figsize=(30, 20))
     
-    # Use a better layout for tree spreading - try different layouts
-    try:
-        # Try force-directed layout with strong repulsion for node separation
-        pos = nx.spring_layout(G, k=1.5, iterations=200, seed=42)
-    except:
-        try:
-            # Try kamada-kawai layout which often gives good spacing
-            pos = nx.kamada_kawai_layout(G)
-        except:
-            # Fall back to spring layout with stronger repulsion
-            pos = nx.spring_layout(G, k=2.0, iterations=300)
-    
-    # Draw solution path nodes larger and in a different color
-    solution_nodes = [n for n, attrs in G.nodes(data=True) if attrs.get('in_solution', False)]
-    other_nodes = [n for n, attrs in G.nodes(data=True) if not attrs.get('in_solution', False)]
-    
-    nx.draw_networkx_nodes(G, pos, nodelist=solution_nodes, node_color='red', node_size=300)
-    nx.draw_networkx_nodes(G, pos, nodelist=other_nodes, node_color='blue', node_size=80)
-    
-    # Draw edges, solution path edges thicker
-    solution_edges = [(u, v) for u, v in G.edges() if u in solution_nodes and v in solution_nodes]
-    other_edges = [(u, v) for u, v in G.edges() if not (u in solution_nodes and v in solution_nodes)]
-    
+    # Node positions and edges as flat arrays (node ids are 0..n-1)
+    n = G.number_of_nodes()
+    pos_arr = np.array([pos[i] for i in range(n)], dtype=np.float32).reshape(n, 2)
+    in_solution = np.array([G.nodes[i]['in_solution'] for i in range(n)], dtype=bool)
+    edges = np.array(G.edges(), dtype=np.int32).reshape(-1, 2)
+    solution_edge_mask = in_solution[edges[:, 0]] & in_solution[edges[:, 1]]
+    solution_nodes = np.flatnonzero(in_solution).tolist()
+    
+    # Draw a uniform sample of the other nodes (and only edges between drawn
+    # nodes); the solution path is always drawn in full
+    drawn = in_solution.copy()
+    other = np.flatnonzero(~in_solution)
+    if len(other) > FULL_TREE_SAMPLE_NODES:
+        other = np.random.default_rng(42).choice(other, FULL_TREE_SAMPLE_NODES, replace=False)
+    drawn[other] = True
+    other_edges = edges[~solution_edge_mask]
+    other_edges = other_edges[drawn[other_edges[:, 0]] & drawn[other_edges[:, 1]]]
+    
+    # Draw all other edges as one LineCollection and other nodes as one scatter;
+    # only the solution path gets per-edge arrows
+    ax = plt.gca()
+    ax.add_collection(LineCollection(pos_arr[other_edges],
+                                     linewidths=0.8, colors=(0, 0, 0, 0.5), zorder=1))
+    ax.scatter(pos_arr[other, 0], pos_arr[other, 1], s=80, c='blue', zorder=2)
+    ax.scatter(pos_arr[in_solution, 0], pos_arr[in_solution, 1], s=300, c='red', zorder=2)
+    ax.autoscale_view()
+    
+    solution_edges = [tuple(e) for e in edges[solution_edge_mask].tolist()]
     nx.draw_networkx_edges(G, pos, edgelist=solution_edges, width=3, edge_color='red')
-    nx.draw_networkx_edges(G, pos, edgelist=other_edges, width=0.8, alpha=0.5)
     
     # Only label solution path nodes to reduce clutter
     solution_labels = {n: f"R:{G.nodes[n]['pos']}" for n in solution_nodes}
@@ -88,7 +78,7 @@ def visualize_real_bfs_tree(all_states, goal_state, grid):
     plt.plot([], [], 'bo', markersize=5, label='Explored States')
     plt.legend(fontsize=14)
     
-    plt.title(f"Actual BFS Search Tree (Nodes Explored: {len(all_states)})", fontsize=16)
+    plt.title(f"Actual BFS Search Tree (Nodes Explored: {num_states})", fontsize=16)
     plt.axis('off')
     plt.tight_layout()
     
@@ -99,33 +89,84 @@ def visualize_real_bfs_tree(all_states, goal_state, grid):
     plt.close()
     
     print(f"Actual BFS tree visualization saved to {os.path.join(output_dir, 'actual_bfs_tree.png')}")
+
+def visualize_real_bfs_tree(all_states, goal_state, grid):
+   
+    print(f"Building visualization for {len(all_states)} actual BFS states...")
+    
+    # Give every state a small integer node id in one pass
+    states = list(all_states.values())
+    idx = {id(state): i for i, state in enumerate(states)}
+    
+    # One pass over the states: node attributes, parent -> child edges and
+    # per-node child lists (reused by the simplified tree)
+    nodes, edges, children = [], [], {}
+    for i, state in enumerate(states):
+        nodes.append((i, {'pos': state.robot_pos,
+                          'boxes': state.boxes,
+                          'depth': state.depth,
+                          'in_solution': False}))
+        parent_id = idx.get(id(state.parent))
+        if parent_id is not None:
+            edges.append((parent_id, i))
+            children.setdefault(parent_id, []).append(i)
+    
+    G = nx.DiGraph()
+    G.add_nodes_from(nodes)
+    G.add_edges_from(edges)
+    
+    # Now mark the solution path
+    # Trace back from goal to start
+    solution_path = []
+    current = goal_state
+    while current:
+        solution_path.append(current)
+        current = current.parent
+    solution_path.reverse()
+    
+    # Mark solution path nodes
+    for state in solution_path:
+        node_id = idx.get(id(state))
+        if node_id is not None:
+            G.nodes[node_id]['in_solution'] = True
+    
+    print(f"Created graph with {len(G.nodes())} nodes and {len(G.edges())} edges")
+    
+    # The search graph is a tree, so lay it out directly instead of
+    # running a force-directed layout over every node
+    pos = tree_layout(G)
+    
+    if len(all_states) <= FULL_TREE_MAX_NODES:
+        draw_full_tree(G, pos, len(all_states))
+    else:
+        print(f"Skipping full tree plot: {len(all_states)} nodes exceeds {FULL_TREE_MAX_NODES}")
     
     # Also create a simplified version with essential nodes only
-    create_simplified_actual_tree(solution_path, G, all_states)
+    create_simplified_actual_tree(solution_path, children, states, idx, pos)
+    
+    return G, pos
 
-def create_simplified_actual_tree(solution_path, full_graph, all_states):
+def create_simplified_actual_tree(solution_path, children, states, idx, pos):
     """
     Create a simplified version of the actual search tree showing essential structure.
+    children maps a node id of the full tree to its child node ids; nodes reuse
+    the positions of their states in the full tree layout (pos).
     """
     G_simple = nx.DiGraph()
+    solution_ids = {idx[id(state)] for state in solution_path}
     
     # Add solution path nodes
     for i, state in enumerate(solution_path):
-        state_hash = hash(state)
-        node_id = f"sol_{state_hash}"
+        node_id = ('sol', idx[id(state)])
         G_simple.add_node(node_id, pos=state.robot_pos, depth=state.depth, in_solution=True)
         
         # Add edge to previous node in solution path
         if i > 0:
-            prev_hash = hash(solution_path[i-1])
-            G_simple.add_edge(f"sol_{prev_hash}", node_id)
+            G_simple.add_edge(('sol', idx[id(solution_path[i-1])]), node_id)
     
     # Add some representative branch points
     # Find branch points by looking at nodes with multiple children
-    branch_points = []
-    for node in full_graph.nodes():
-        if full_graph.out_degree(node) > 1:
-            branch_points.append(node)
+    branch_points = [node for node, kids in children.items() if len(kids) > 1]
     
     # Add a subset of branch points to show the search structure
     added_branches = 0
@@ -136,61 +177,40 @@ def create_simplified_actual_tree(solution_path, full_graph, all_states):
             break
             
         # Skip if this is a solution node (already added)
-        if full_graph.nodes[bp].get('in_solution', False):
+        if bp in solution_ids:
             continue
             
-        # Get original state hash from node id (node_HASH)
-        orig_hash = int(bp.split('_')[1])
-        if orig_hash not in all_states:
-            continue
-            
-        state = all_states[orig_hash]
-        branch_id = f"branch_{orig_hash}"
+        state = states[bp]
+        branch_id = ('branch', bp)
         
         # Add the branch point
         G_simple.add_node(branch_id, pos=state.robot_pos, depth=state.depth, in_solution=False)
         
         # Add edge from parent if possible
-        if state.parent:
-            parent_hash = hash(state.parent)
-            # Check if parent is a solution node
-            parent_in_solution = False
-            for sol_state in solution_path:
-                if hash(sol_state) == parent_hash:
-                    parent_in_solution = True
-                    break
-                    
-            if parent_in_solution:
-                G_simple.add_edge(f"sol_{parent_hash}", branch_id)
+        parent_id = idx.get(id(state.parent))
+        if parent_id is not None:
+            if parent_id in solution_ids:
+                G_simple.add_edge(('sol', parent_id), branch_id)
             else:
                 # Add non-solution parent if not already added
-                if f"branch_{parent_hash}" in G_simple.nodes:
-                    G_simple.add_edge(f"branch_{parent_hash}", branch_id)
+                if ('branch', parent_id) in G_simple.nodes:
+                    G_simple.add_edge(('branch', parent_id), branch_id)
                     
         # Add some children of this branch point
-        children = list(full_graph.successors(bp))
-        for i, child in enumerate(children[:3]):  # Limit to 3 children per branch
-            # Get original hash
-            try:
-                child_hash = int(child.split('_')[1])
-                if child_hash in all_states:
-                    child_state = all_states[child_hash]
-                    child_id = f"child_{child_hash}_{i}"
-                    G_simple.add_node(child_id, pos=child_state.robot_pos, depth=child_state.depth, in_solution=False)
-                    G_simple.add_edge(branch_id, child_id)
-            except:
-                continue
+        for i, child in enumerate(children[bp][:3]):  # Limit to 3 children per branch
+            child_state = states[child]
+            child_id = ('child', child, i)
+            G_simple.add_node(child_id, pos=child_state.robot_pos, depth=child_state.depth, in_solution=False)
+            G_simple.add_edge(branch_id, child_id)
                 
         added_branches += 1
     
     # Draw the simplified graph
     plt.figure(figsize=(25, 18))
     
-    # Use a clearer layout for the simplified tree
-    try:
-        pos = nx.kamada_kawai_layout(G_simple)
-    except:
-        pos = nx.spring_layout(G_simple, k=1.0, iterations=100)
+    # G_simple is a subgraph of the full tree: every node id carries the index
+    # of its underlying state, so reuse the full layout instead of a new one
+    pos = {n: pos[n[1]] for n in G_simple.nodes()}
     
     # Draw solution path nodes
     solution_nodes = [n for n, attrs in G_simple.nodes(data=True) if attrs.get('in_solution', True)]
@@ -215,12 +235,13 @@ def create_simplified_actual_tree(solution_path, full_graph, all_states):
     plt.plot([], [], 'bo', markersize=5, label='Explored States')
     plt.legend(fontsize=14)
     
-    plt.title(f"Simplified Actual BFS Tree (Total Nodes Explored: {len(all_states)})", fontsize=16)
+    plt.title(f"Simplified Actual BFS Tree (Total Nodes Explored: {len(states)})", fontsize=16)
     plt.axis('off')
     plt.tight_layout()
     
     # Save the simplified tree
     output_dir = "visualization"
+    os.makedirs(output_dir, exist_ok=True)
     plt.savefig(os.path.join(output_dir, "simplified_actual_bfs_tree.png"), dpi=200)
     plt.close()
     
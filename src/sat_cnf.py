@@ -0,0 +1,203 @@
+import shutil
+import subprocess
+import numpy as np
+from z3 import Solver, sat, unsat, is_true
+from sat_encoding import slide_tables, box_reachable
+
+try:                                    # optional: a native SAT solver
+    from pysat.solvers import Glucose4
+except ImportError:                     # z3 parses the same DIMACS text instead
+    Glucose4 = None
+
+# optional: a standalone SAT solver on PATH, tried before the two above
+EXTERNAL_SAT = next(filter(None, map(shutil.which, ('kissat', 'cadical'))), None)
+
+# Same transition system as sat_encoding, emitted directly as integer CNF
+# clauses. No z3 AST is built, so encoding cost is plain Python list work.
+
+class VarFactory:
+    """Hands out DIMACS variable numbers 1, 2, 3, ..."""
+    def __init__(self):
+        self.count = 0
+
+    def new(self):
+        self.count += 1
+        return self.count
+
+    def block(self, n):
+        return [self.new() for _ in range(n)]
+
+def implies(a, lits):
+    """Clauses for a -> (l1 and l2 and ...)."""
+    return [[-a, l] for l in lits]
+
+def exactly_one(clauses, vf, lits):
+    """
+    Sequential-counter exactly-one: O(n) clauses and n-1 auxiliary variables.
+    (Kept over a binary/log AMO -- log n selector bits, n log n clauses --
+    which made the horizon search slower.)
+    """
+    clauses.append(list(lits))
+    n = len(lits)
+    if n < 2:
+        return
+    s = vf.block(n - 1)             # s[k]: some of lits[0..k] is true
+    clauses.append([-lits[0], s[0]])
+    for k in range(1, n - 1):
+        clauses.append([-lits[k], s[k]])
+        clauses.append([-s[k - 1], s[k]])
+        clauses.append([-lits[k], -s[k - 1]])
+    clauses.append([-lits[-1], -s[-1]])
+
+def encode_cnf(grid, start, goal, boxes, max_t):
+    """
+    Encode "reach goal in exactly max_t moves" as CNF.
+    Returns (clauses, num_vars, free_cells, R, B) where R[t][i] / B[t][i][b]
+    are the variables for robot / box b on free cell i at timestep t.
+    """
+    free_cells, cell_id, path_len, path_ids = slide_tables(grid)
+    F, num_boxes = len(free_cells), len(boxes)
+    vf = VarFactory()
+    clauses = []
+
+    R = [vf.block(F) for _ in range(max_t + 1)]
+    B = [[vf.block(num_boxes) for _ in range(F)] for _ in range(max_t + 1)]
+    A = [vf.block(F) for _ in range(max_t + 1)] if num_boxes else None  # A <-> some box on i
+
+    box_reach = box_reachable(cell_id, path_len, path_ids, boxes)
+
+    # -------- unique --------
+    for t in range(max_t + 1):
+        exactly_one(clauses, vf, R[t])
+        for b in range(num_boxes):
+            exactly_one(clauses, vf, [B[t][i][b] for i in range(F)])
+        if num_boxes:
+            for i in range(F):
+                cell = B[t][i]
+                for b1 in range(num_boxes):
+                    clauses.append([-cell[b1], A[t][i]])
+                    for b2 in range(b1 + 1, num_boxes):
+                        clauses.append([-cell[b1], -cell[b2]])
+                clauses.append([-A[t][i]] + cell)
+            for i, b in zip(*np.nonzero(~box_reach)):          # dead cells
+                clauses.append([-B[t][i][b]])
+
+    # -------- initial state and goal --------
+    clauses.append([R[0][cell_id[start]]])
+    for b, cell in enumerate(boxes):
+        clauses.append([B[0][cell_id[cell]][b]])
+    clauses.append([R[max_t][cell_id[goal]]])
+
+    for t in range(max_t):
+        M = vf.block(4)
+        clauses.append(list(M))
+        for a1 in range(4):
+            for a2 in range(a1 + 1, 4):
+                clauses.append([-M[a1], -M[a2]])
+
+        for a in range(4):
+            clauses.append([-M[a]] + [R[t][i] for i in np.flatnonzero(path_len[a]).tolist()])
+
+        pushed = [[] for _ in range(num_boxes)]
+        for i in range(F):
+            for a in range(4):
+                ids = path_ids[a, i, :path_len[a, i]].tolist()
+                if not ids:
+                    clauses.append([-R[t][i], -M[a]])
+                    continue
+
+                # 1. no box in the path: slide to the wall
+                clear = [A[t][j] for j in ids] if num_boxes else []
+                clauses.append([-R[t][i], -M[a]] + clear + [R[t + 1][ids[-1]]])
+                if not num_boxes:
+                    continue
+
+                # 2. first box at ids[k], stopped at ids[m] by the wall or a box
+                for k, j in enumerate(ids):
+                    for m in range(k, len(ids)):
+                        stop = ids[m]
+                        robot_next = ids[m - 1] if m > 0 else i
+                        body = ([R[t][i], M[a]] + [-A[t][x] for x in ids[:k]]
+                                + [-A[t][x] for x in ids[k + 1:m + 1]])
+                        if m + 1 < len(ids):
+                            body.append(A[t][ids[m + 1]])
+                        for b in range(num_boxes):
+                            x = vf.new()                # x <-> this push of box b
+                            lits = body + [B[t][j][b]]
+                            clauses.extend(implies(x, lits))
+                            clauses.append([-l for l in lits] + [x])
+                            clauses.extend(implies(x, [R[t + 1][robot_next], B[t + 1][stop][b]]))
+                            pushed[b].append(x)
+
+        # -------- frame: a box that is not pushed stays put --------
+        for b in range(num_boxes):
+            if pushed[b]:
+                p = vf.new()
+                clauses.append([-p] + pushed[b])
+                clauses.extend([-x, p] for x in pushed[b])
+                keep = [p]
+            else:
+                keep = []
+            for i in range(F):
+                clauses.append([-B[t][i][b]] + keep + [B[t + 1][i][b]])
+
+    return clauses, vf.count, free_cells, R, B
+
+def dimacs(clauses, num_vars):
+    """DIMACS text for the clauses."""
+    lines = [f"p cnf {num_vars} {len(clauses)}"]
+    lines += [" ".join(map(str, c)) + " 0" for c in clauses]
+    return "\n".join(lines) + "\n"
+
+def solve_external(clauses, num_vars, exe=EXTERNAL_SAT):
+    """
+    Run a competition-format solver (kissat, cadical) on the DIMACS text via
+    stdin. Exit code 10 is SAT with the model on "v" lines, 20 is UNSAT.
+    """
+    out = subprocess.run([exe, '-q'], input=dimacs(clauses, num_vars),
+                         capture_output=True, text=True)
+    if out.returncode == 20:
+        return None
+    if out.returncode != 10:
+        raise RuntimeError(f"{exe} exited with {out.returncode}: {out.stderr.strip()}")
+    return {v for line in out.stdout.splitlines() if line.startswith('v')
+            for v in map(int, line.split()[1:]) if v > 0}
+
+def solve_cnf(clauses, num_vars):
+    """Set of true variables in a model, or None if unsatisfiable."""
+    if EXTERNAL_SAT is not None:
+        return solve_external(clauses, num_vars)
+
+    if Glucose4 is not None:
+        with Glucose4(bootstrap_with=clauses) as s:
+            if not s.solve():
+                return None
+            return {v for v in s.get_model() if v > 0}
+
+    # z3 parses DIMACS from memory, so no temporary file is needed
+    solver = Solver()
+    solver.from_string(dimacs(clauses, num_vars))
+    check_result = solver.check()
+    if check_result == unsat:
+        return None
+    if check_result != sat:
+        raise RuntimeError(f"z3 returned unknown: {solver.reason_unknown()}")
+    model = solver.model()
+    # z3 names DIMACS variable n "k!n"
+    return {int(d.name()[2:]) for d in model.decls() if is_true(model[d])}
+
+def plan_sat_cnf(grid, start, goal, boxes, max_t):
+    """Plan reaching the goal in exactly max_t moves as (path, box_paths), or None."""
+    clauses, num_vars, free_cells, R, B = encode_cnf(grid, start, goal, boxes, max_t)
+    true_vars = solve_cnf(clauses, num_vars)
+    if true_vars is None:
+        return None
+
+    path = []
+    box_paths = [[] for _ in boxes]
+    for t in range(max_t + 1):
+        path.append(next(free_cells[i] for i, v in enumerate(R[t]) if v in true_vars))
+        for b in range(len(boxes)):
+            box_paths[b].append(next(free_cells[i] for i in range(len(free_cells))
+                                     if B[t][i][b] in true_vars))
+    return path, box_paths
@@ -1,155 +1,431 @@
+import os
+from functools import lru_cache
+import numpy as np
 from z3 import *
 
-def encode_sat_plan(grid, start, goal, boxes, obstacles, max_t):
+DIRECTIONS = [(-1, 0), (1, 0), (0, -1), (0, 1)]      # UP, DOWN, LEFT, RIGHT
 
-    set_param("parallel.enable", True)          #
-    set_param("smt.threads", 8)
-    rows, cols  = len(grid), len(grid[0])
-    num_boxes   = len(boxes)
-    directions  = [(-1, 0), (1, 0), (0, -1), (0, 1)]      # UP, DOWN, LEFT, RIGHT
+# Canonical variables: a name depends only on (kind, t[, box]), never on the
+# horizon being solved, so the same variable means the same thing in every
+# horizon. This is what lets the incremental solver keep its learned clauses
+# and lets load_sat_plan re-bind variables parsed from a cached encoding.
+# The wrappers are cached, so re-encoding a horizon reuses the same objects.
+#
+# Positions are log-encoded: the robot (and each box) has one bit-vector per
+# timestep holding the index of its cell in free_cells, and "on cell i" is the
+# predicate pos == i. Exactly-one comes for free from the bit-vector's value.
+def pos_bits(num_cells):
+    return max(1, (num_cells - 1).bit_length())
+
+@lru_cache(maxsize=None)
+def robot_pos(t, bits):
+    return BitVec(f"RP_{t}", bits)
+
+@lru_cache(maxsize=None)
+def box_pos(t, b, bits):
+    return BitVec(f"BP_{t}_{b}", bits)
+
+@lru_cache(maxsize=None)
+def move_bv(t):
+    return BitVec(f"MV_{t}", 2)
+
+@lru_cache(maxsize=None)
+def move_var(t, a):
+    """The move at step t is direction a; a 2-bit value is exactly-one by itself."""
+    return move_bv(t) == a
+
+# Bool connectives that go straight to the C API. Every argument the encoder
+# passes is already a BoolRef in the main context, so z3's And/Or/Implies
+# spend most of the encoding time re-checking sorts that can't be wrong.
+def _nary(mk, args):
+    args = list(args)
+    if not args:
+        raise ValueError("fast_and/fast_or need at least one argument")
+    ctx = args[0].ctx
+    arr = (Ast * len(args))(*[arg.as_ast() for arg in args])
+    return BoolRef(mk(ctx.ref(), len(args), arr), ctx)
+
+def fast_and(*args):
+    return _nary(Z3_mk_and, args)
+
+def fast_or(args):
+    return _nary(Z3_mk_or, args)
+
+def fast_implies(a, b):
+    return BoolRef(Z3_mk_implies(a.ctx.ref(), a.as_ast(), b.as_ast()), a.ctx)
+
+def enable_parallel(threads=8):
+    """
+    Opt in to Z3's multi-threaded modes; call before any solver is created.
+    make_solver() runs on Z3's SAT core, so sat.threads is the setting that
+    applies to it; smt.threads only reaches the SMT core. parallel.enable is
+    left off: with it the QF_FD solver answers unknown on a plain check().
+    """
+    set_param("sat.threads", threads)
+    set_param("smt.threads", threads)
+
+def make_solver():
+    """
+    The encodings only use Bools and small bit-vectors, so use Z3's
+    finite-domain solver. Unlike a Then(..., 'qffd') tactic pipeline it stays
+    incremental, which the horizon-by-horizon search relies on.
+    """
+    return SolverFor("QF_FD")
+
+class CellTable:
+    """
+    Read-only (t, r, c[, b]) view over the per-timestep "on cell i" predicates,
+    so callers that address positions by cell (plan_sat, goal tests) keep working.
+    """
+    def __init__(self, layers, cell_id):
+        self.layers = layers
+        self.cell_id = cell_id
+
+    def __getitem__(self, key):
+        t, r, c, *b = key
+        return self.layers[t][(self.cell_id[(r, c)], *b)]
 
-    # -------- pre‑compute straight paths ignoring --------
-    free_cells = [(r, c) for r in range(rows) for c in range(cols)
-                  if grid[r][c] != '#']
+class PosTable:
+    """
+    The same (t, r, c[, b]) view for a parsed encoding that has only the RP_t /
+    BP_t_b bit-vectors; each predicate is built on demand.
+    """
+    def __init__(self, cell_id, bits):
+        self.cell_id = cell_id
+        self.bits = bits
 
-    path_cells, static_stop = {}, {}
-    for r, c in free_cells:
-        for a, (dr, dc) in enumerate(directions):
-            seq = []
+    def __getitem__(self, key):
+        t, r, c, *b = key
+        var = box_pos(t, b[0], self.bits) if b else robot_pos(t, self.bits)
+        return var == self.cell_id[(r, c)]
+
+def free_cells_of(grid):
+    """Free (non-'#') cells in row-major order; position values index this list."""
+    return [(r, c) for r, row in enumerate(grid) for c, ch in enumerate(row) if ch != '#']
+
+def slide_tables(grid):
+    """
+    Boxes ignored, pre-compute every straight slide on the map.
+    Returns (free_cells, cell_id, path_len, path_ids): cell_id maps a free cell
+    to its index in free_cells; the slide from cell i in direction a passes over
+    the path_len[a, i] cells path_ids[a, i, :path_len[a, i]] up to the wall
+    (the last one is where a box stops). Unused slots of path_ids hold -1.
+    This runs once per encoding, so plain Python is fast enough.
+    """
+    rows, cols = len(grid), len(grid[0])
+    free_cells = free_cells_of(grid)
+    cell_id = {cell: i for i, cell in enumerate(free_cells)}
+
+    path_len = np.zeros((4, len(free_cells)), dtype=np.int32)
+    path_ids = np.full((4, len(free_cells), max(rows, cols)), -1, dtype=np.int32)
+    for i, (r, c) in enumerate(free_cells):
+        for a, (dr, dc) in enumerate(DIRECTIONS):
+            k = 0
             rr, cc = r, c
             while True:
                 rr += dr; cc += dc
                 if not (0 <= rr < rows and 0 <= cc < cols): break
                 if grid[rr][cc] == '#': break
-                seq.append((rr, cc))
-            path_cells[(r, c, a)]  = seq                       # robot path
-            static_stop[(r, c, a)] = seq[-1] if seq else (r, c)  # box stop
+                path_ids[a, i, k] = cell_id[(rr, cc)]
+                k += 1
+            path_len[a, i] = k
+    return free_cells, cell_id, path_len, path_ids
 
-    solver = Solver()
-    RobotAt, BoxAt, Move = {}, {}, {}
+def box_reachable(cell_id, path_len, path_ids, boxes):
+    """
+    reach[i, b]: box b can ever be on free cell i. A push slides the box along
+    its path in the push direction and needs the robot on the free cell behind
+    it; another box may stop it anywhere on the way, so every path cell counts.
+    Cells outside this closure (e.g. anything past a box wedged in a corner)
+    are dead for that box.
+    """
+    opposite = [1, 0, 3, 2]
+    reach = np.zeros((path_len.shape[1], len(boxes)), dtype=bool)
+    for b, cell in enumerate(boxes):
+        stack = [cell_id[cell]]
+        reach[stack[0], b] = True
+        while stack:
+            j = stack.pop()
+            for a in range(4):
+                if not path_len[opposite[a], j]:      # no cell to push from
+                    continue
+                for x in path_ids[a, j, :path_len[a, j]].tolist():
+                    if not reach[x, b]:
+                        reach[x, b] = True
+                        stack.append(x)
+    return reach
 
-    for t in range(max_t + 1):
-        for r, c in free_cells:
-            RobotAt[(t, r, c)] = Bool(f"R_{t}_{r}_{c}")
-            for b in range(num_boxes):
-                BoxAt[(t, r, c, b)] = Bool(f"B_{t}_{r}_{c}_{b}")
+# Memoized subformulas and per-step transition constraints depend only on the
+# map and the number of boxes, so every encoding of the same map in this process
+# shares them: re-encoding at a larger horizon only builds the new timesteps.
+# Only the most recently used maps are kept, so a process that plans many maps
+# doesn't hold every map's step formulas.
+@lru_cache(maxsize=4)
+def _map_subformula_cache(map_text, num_boxes):
+    return {'any_box': {}, 'no_box': {}, 'clear': {}, 'move_here': {}, 'step': {}}
 
-    for t in range(max_t):
-        for a in range(4):
-            Move[(t, a)] = Bool(f"M_{t}_{a}")
-        solver.add(PbEq([(Move[(t, a)], 1) for a in range(4)], 1))   # 
-
-    any_box_cache = {}
-    def any_box(t, r, c):
-        key = (t, r, c)
-        if key not in any_box_cache:
-            any_box_cache[key] = Or([BoxAt[(t, r, c, b)] for b in range(num_boxes)]) if num_boxes else BoolVal(False)
-        return any_box_cache[key]
-
-    # -------- unique --------
-    for t in range(max_t + 1):
-        solver.add(PbEq([(RobotAt[(t, r, c)], 1) for r, c in free_cells], 1)) 
-        if num_boxes > 0:         # robot unique
-            for b in range(num_boxes):
-                solver.add(PbEq([(BoxAt[(t, r, c, b)], 1) for r, c in free_cells], 1))     # box unique
-            for r, c in free_cells:                                                        # same cell
-                solver.add(AtMost(*[BoxAt[(t, r, c, b)] for b in range(num_boxes)], 1))
-
-    solver.add(RobotAt[(0, *start)])
-    for r, c in free_cells:
-        if (r, c) != start:
-            solver.add(Not(RobotAt[(0, r, c)]))
-
-    for b, (br, bc) in enumerate(boxes):
-        solver.add(BoxAt[(0, br, bc, b)])
-        for r, c in free_cells:
-            if (r, c) != (br, bc):
-                solver.add(Not(BoxAt[(0, r, c, b)]))
-
-    solver.add(RobotAt[(max_t, *goal)])
-
-    pushed = {(t, b): [] for t in range(max_t) for b in range(num_boxes)}
+def _subformula_cache(grid, num_boxes):
+    return _map_subformula_cache("\n".join("".join(row) for row in grid), num_boxes)
 
-    for t in range(max_t):
+def init_encoding(grid, start, boxes, obstacles):
+    """
+    Build the horizon-independent part of the SAT encoding: the slide tables,
+    the solver, the timestep-0 variables and the initial state.
+    Returns an encoding dict that extend_one_step() grows one timestep at a time.
+    """
+    rows, cols  = len(grid), len(grid[0])
+    num_boxes   = len(boxes)
+
+    free_cells, cell_id, path_len, path_ids = slide_tables(grid)
+
+    robot, box = [], []
+    enc = {
+        'solver': make_solver(), 'grid': grid, 'rows': rows, 'cols': cols,
+        'num_boxes': num_boxes, 'directions': DIRECTIONS, 'free_cells': free_cells,
+        'cell_id': cell_id, 'path_len': path_len, 'path_ids': path_ids, 'robot': robot, 'box': box,
+        'RobotAt': CellTable(robot, cell_id), 'BoxAt': CellTable(box, cell_id),
+        'box_reach': box_reachable(cell_id, path_len, path_ids, boxes),
+        'Move': {}, 'goal_lits': set(), 'horizon': 0,
+    }
+    cache = _subformula_cache(grid, num_boxes)
+    enc['any_box_cache'] = cache['any_box']
+    enc['no_box_cache'] = cache['no_box']
+    enc['clear_cache'] = cache['clear']
+    enc['move_here_cache'] = cache['move_here']
+    enc['step_cache'] = cache['step']
+    _declare_timestep(enc, 0)
+
+    solver = enc['solver']
+    # A position bit-vector holds one cell, so this rules out every other cell.
+    # Pinning box b to boxes[b] also fixes every box's identity (find_positions
+    # lists them row-major, i.e. lex-leader order), and the slide dynamics carry
+    # that identity forward, so there is no B! relabelling left to break.
+    solver.add([robot[0][cell_id[start]]]
+               + [box[0][cell_id[cell], b] for b, cell in enumerate(boxes)])
+
+    return enc
+
+def _declare_timestep(enc, t):
+    """Declare the robot/box positions for timestep t and constrain their domains."""
+    solver = enc['solver']
+    num_cells, num_boxes = len(enc['free_cells']), enc['num_boxes']
+    bits = pos_bits(num_cells)
 
-        # only one direction can be moved
+    rp = robot_pos(t, bits)
+    bps = [box_pos(t, b, bits) for b in range(num_boxes)]
+    R = np.empty(num_cells, dtype=object)
+    B = np.empty((num_cells, num_boxes), dtype=object)
+    for i in range(num_cells):
+        R[i] = rp == i
+        for b in range(num_boxes):
+            B[i, b] = bps[b] == i
+    enc['robot'].append(R)
+    enc['box'].append(B)
+
+    # -------- unique -------- (collected, then added in one call)
+    cons = []
+    if num_cells < 1 << bits:                 # only free-cell indices are positions
+        cons.extend(ULT(p, num_cells) for p in [rp] + bps)
+    if num_boxes > 1:                         # same cell
+        cons.append(Distinct(bps))
+    cons.extend(Not(B[i, b]) for i, b in zip(*np.nonzero(~enc['box_reach'])))  # dead cells
+    solver.add(cons)
+
+def any_box(enc, t, i):
+    """Some box is on cell i at time t. Memoized, so every use shares one AST node."""
+    key = (t, i)
+    cache = enc['any_box_cache']
+    if key not in cache:
+        cache[key] = fast_or(enc['box'][t][i]) if enc['num_boxes'] else BoolVal(False)
+    return cache[key]
+
+def no_box(enc, t, i):
+    """Not(any_box(enc, t, i)), memoized the same way."""
+    key = (t, i)
+    cache = enc['no_box_cache']
+    if key not in cache:
+        cache[key] = Not(any_box(enc, t, i))
+    return cache[key]
+
+def clear_prefixes(enc, t, i, a):
+    """
+    prefixes[k] = no box on the first k cells of the slide from cell i in direction a.
+    Each prefix extends the previous one, so the full clear-path conjunction and
+    every push precondition share a single chain of AST nodes. The prefixes are
+    left unnamed: giving each its own Bool (C == And(prev, Not(box))) made the
+    solver slower.
+    """
+    key = (t, i, a)
+    cache = enc['clear_cache']
+    if key not in cache:
+        prefixes = [BoolVal(True)]
+        for j in enc['path_ids'][a, i, :enc['path_len'][a, i]].tolist():
+            not_box = no_box(enc, t, j)
+            prefixes.append(not_box if len(prefixes) == 1 else fast_and(prefixes[-1], not_box))
+        cache[key] = prefixes
+    return cache[key]
+
+def move_here(enc, t, i, a):
+    """The robot is on cell i and moves in direction a at time t. Memoized like any_box."""
+    key = (t, i, a)
+    cache = enc['move_here_cache']
+    if key not in cache:
+        cache[key] = fast_and(enc['robot'][t][i], move_var(t, a))
+    return cache[key]
+
+def extend_one_step(enc, t):
+    """
+    Add timestep t+1 and the transition constraints from t to t+1.
+    Only the delta is emitted, so the solver (and its learned clauses) is reused.
+    """
+    assert t == enc['horizon'], "timesteps must be added in order"
+    _declare_timestep(enc, t + 1)
+
+    for a in range(4):
+        enc['Move'][(t, a)] = move_var(t, a)
+    # transitions depend only on the map, so a re-encoding reuses them as built
+    steps = enc['step_cache']
+    if t not in steps:
+        steps[t] = _transition_constraints(enc, t)
+    enc['solver'].add(steps[t])
+
+    enc['horizon'] = t + 1
+
+def _transition_constraints(enc, t):
+    """The constraints linking timestep t to t+1, as a list."""
+    Move = enc['Move']
+    num_boxes, free_cells = enc['num_boxes'], enc['free_cells']
+    path_len, path_ids = enc['path_len'], enc['path_ids']
+    R_t, R_n = enc['robot'][t], enc['robot'][t + 1]
+    B_t, B_n = enc['box'][t], enc['box'][t + 1]
+    cons = []
+
+    pushed = {(t, b): [] for b in range(num_boxes)}
+
+    # only one direction can be moved
+    for a in range(4):
+        origins = list(R_t[np.flatnonzero(path_len[a])])
+        cons.append(fast_implies(Move[(t, a)], fast_or(origins) if origins else BoolVal(False)))
+
+    for i in range(len(free_cells)):
         for a in range(4):
-            origins = [RobotAt[(t, r, c)] for r, c in free_cells if path_cells[(r, c, a)]]
-            solver.add(Implies(Move[(t, a)], Or(origins)))
-
-        for r, c in free_cells:
-            for a, (dr, dc) in enumerate(directions):
-                seq = path_cells[(r, c, a)]
-                if not seq:
-                    solver.add(Not(And(RobotAt[(t, r, c)], Move[(t, a)])))
-                    continue
+            ids = path_ids[a, i, :path_len[a, i]].tolist()
+            if not ids:
+                cons.append(Not(move_here(enc, t, i, a)))
+                continue
 
-                move_here = And(RobotAt[(t, r, c)], Move[(t, a)])
-
-                # 1. no box in the path
-                clear_seq = And([Not(any_box(t, x, y)) for x, y in seq])
-                dst_r, dst_c = static_stop[(r, c, a)]
-                solver.add(Implies(And(move_here, clear_seq),
-                                   RobotAt[(t + 1, dst_r, dst_c)]))
-                for b in range(num_boxes):
-                    for x, y in free_cells:
-                        solver.add(Implies(And(move_here, clear_seq, BoxAt[(t, x, y, b)]),
-                                           BoxAt[(t + 1, x, y, b)]))
-
-                # 2. box in the path → push the first box stopped by a wall or another box
-                prefix_clear_to_box = BoolVal(True)     
-                for bx, by in seq:
-                    box_here      = any_box(t, bx, by)
-                    first_box_ok  = And(move_here, prefix_clear_to_box, box_here)
-
-                    prefix_clear_to_box = And(prefix_clear_to_box, Not(box_here))
-
-                    if not is_bool(first_box_ok):
-                        continue
-
-                    
-                    clear_between = BoolVal(True)       
-                    cx, cy = bx, by
-                    while True:
-                        nx, ny = cx + dr, cy + dc
-
-                        if not (0 <= nx < rows and 0 <= ny < cols) or grid[nx][ny] == '#':
-                            stop_x, stop_y = cx, cy
-                            push_any = And(first_box_ok, clear_between)   
-                            for b in range(num_boxes):
-                                push_b = And(push_any, BoxAt[(t, bx, by, b)])
-                                if str(push_b) == "False": 
-                                    continue
-                                robot_next = (stop_x - dr, stop_y - dc)
-                                solver.add(Implies(push_b,
-                                                   And(RobotAt[(t + 1, *robot_next)],
-                                                       BoxAt[(t + 1, stop_x, stop_y, b)])))
-                                pushed[(t, b)].append(push_b)
-                            break    
-
-                        blocker_is_box = any_box(t, nx, ny)
-
-                        stop_x, stop_y = cx, cy
-                        push_any = And(first_box_ok, clear_between, blocker_is_box)
+            here = move_here(enc, t, i, a)
+
+            # 1. no box in the path
+            prefixes  = clear_prefixes(enc, t, i, a)
+            clear_seq = prefixes[-1]
+            cons.append(fast_implies(fast_and(here, clear_seq), R_n[ids[-1]]))
+            # boxes staying put is left to the per-box frame axiom below:
+            # a clear slide pushes nothing, so every pushed_b is false
+
+            # 2. box in the path → push the first box stopped by a wall or another box.
+            # The cells beyond the box in this direction are the rest of the slide
+            # path, which ends at the wall.
+            local_pushed = []
+            for k, j in enumerate(ids):
+                box_here      = any_box(enc, t, j)
+                first_box_ok  = fast_and(here, prefixes[k], box_here)
+
+                # the box's own slide is ids[k+1:], so "clear between the box and
+                # ids[m]" is a clear prefix of that slide, shared by every origin
+                box_clear = clear_prefixes(enc, t, j, a)
+                for m in range(k, len(ids)):
+                    clear_between = box_clear[m - k]
+                    stop = ids[m]
+                    robot_next = ids[m - 1] if m > 0 else i
+
+                    if m + 1 == len(ids):
+                        push_any = fast_and(first_box_ok, clear_between)
                         for b in range(num_boxes):
-                            push_b = And(push_any, BoxAt[(t, bx, by, b)])
-                            solver.add(Implies(push_b,
-                                               And(RobotAt[(t + 1, stop_x - dr, stop_y - dc)],
-                                                   BoxAt[(t + 1, stop_x, stop_y, b)])))
+                            # never constant-False: B_t[j, b] is a free variable
+                            push_b = fast_and(push_any, B_t[j, b])
+                            cons.append(fast_implies(push_b,
+                                                     fast_and(R_n[robot_next], B_n[stop, b])))
                             pushed[(t, b)].append(push_b)
+                            local_pushed.append(push_b)
+                        break
+
+                    blocker_is_box = any_box(enc, t, ids[m + 1])
+
+                    push_any = fast_and(first_box_ok, clear_between, blocker_is_box)
+                    for b in range(num_boxes):
+                        push_b = fast_and(push_any, B_t[j, b])
+                        cons.append(fast_implies(push_b,
+                                                 fast_and(R_n[robot_next], B_n[stop, b])))
+                        pushed[(t, b)].append(push_b)
+                        local_pushed.append(push_b)
+
 
-                        clear_between = And(clear_between, Not(blocker_is_box))
-                        cx, cy = nx, ny
+            # only the pushes this (cell, direction) can cause; pushed[(t, b)]
+            # keeps the per-box lists for the frame axiom
+            push_disj = fast_or(local_pushed) if local_pushed else BoolVal(False)
+            cons.append(fast_implies(here, fast_or([clear_seq, push_disj])))
 
-                push_list = [p for b in range(num_boxes) for p in pushed.get((t, b), [])]
-                push_disj = Or(push_list) if push_list else BoolVal(False)
-                solver.add(Implies(move_here, Or(clear_seq, push_disj)))
+    # frame: one constraint per box instead of one per cell, since an unpushed
+    # box keeps its whole position bit-vector
+    bits = pos_bits(len(free_cells))
+    for b in range(num_boxes):
+        not_pushed_b = Not(fast_or(pushed[(t, b)])) if pushed[(t, b)] else BoolVal(True)
+        cons.append(fast_implies(not_pushed_b, box_pos(t + 1, b, bits) == box_pos(t, b, bits)))
 
+    return cons
+
+def goal_literal(enc, goal, t):
+    """
+    Literal asserting the robot is at the goal at timestep t (use as an assumption).
+    The finite-domain solver only accepts plain Bools as assumptions, so this is
+    a fresh Bool that implies the position predicate.
+    """
+    lit = Bool(f"G_{t}")
+    if t not in enc['goal_lits']:
+        enc['goal_lits'].add(t)
+        enc['solver'].add(Implies(lit, enc['robot'][t][enc['cell_id'][goal]]))
+    return lit
+
+def encode_sat_plan(grid, start, goal, boxes, obstacles, max_t, dump_path=None):
+    """
+    One-shot encoding of "reach the goal in exactly max_t moves".
+    Returns (solver, RobotAt, BoxAt) for plan_sat; incremental callers should
+    use init_encoding/extend_one_step (or sat_planner.IncrementalPlanner).
+    With dump_path the assertions are also written there as SMT-LIB2.
+    """
+    enc = init_encoding(grid, start, boxes, obstacles)
     for t in range(max_t):
-        for b in range(num_boxes):
-            pushed_b = Or(pushed[(t, b)]) if pushed[(t, b)] else BoolVal(False)
-            for r, c in free_cells:
-                solver.add(Implies(And(BoxAt[(t, r, c, b)], Not(pushed_b)),
-                                   BoxAt[(t + 1, r, c, b)]))
+        extend_one_step(enc, t)
+    enc['solver'].add(goal_literal(enc, goal, max_t))
+    if dump_path is not None:
+        save_sat_plan(enc['solver'], dump_path)
+
+    return enc['solver'], enc['RobotAt'], enc['BoxAt']
+
+def save_sat_plan(solver, path):
+    """
+    Write the solver's assertions to an SMT-LIB2 file (atomically).
+    to_smt2() rather than sexpr(): it is much faster to produce, and
+    load_sat_plan reads either.
+    """
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as f:
+        f.write(solver.to_smt2())
+    os.replace(tmp_path, path)
+
+def load_sat_plan(path, grid, num_boxes, max_t):
+    """
+    Rebuild (solver, RobotAt, BoxAt) from a file written by save_sat_plan or
+    sat_smt2.write_smt2_plan.
+    Variables are recreated by name, so they match the parsed assertions.
+    plan_sat reads the bit-vectors directly, so RobotAt/BoxAt are lazy views
+    rather than tables built up front.
+    """
+    solver = make_solver()
+    solver.from_file(path)
 
-    return solver, RobotAt, BoxAt
+    free_cells = free_cells_of(grid)
+    cell_id = {cell: i for i, cell in enumerate(free_cells)}
+    table = PosTable(cell_id, pos_bits(len(free_cells)))
+    return solver, table, table
@@ -1,35 +1,71 @@
 from z3 import *
+from sat_encoding import init_encoding, extend_one_step, goal_literal, free_cells_of, pos_bits, robot_pos, box_pos
 
-def plan_sat(solver, RobotAt, BoxAt, max_t, grid_size, num_boxes, grid):
-    set_param("parallel.enable", True)          #
-    set_param("smt.threads", 8)
-    check_result = solver.check()
-    if check_result != sat:
+def plan_sat(solver, RobotAt, BoxAt, max_t, grid_size, num_boxes, grid, assumptions=()):
+    """
+    Check the encoding and read the plan back as (path, box_paths), or None
+    if it is unsat. An unknown result raises RuntimeError rather than passing
+    for "no plan at this horizon".
+    Positions are read straight off the RP_t / BP_t_b bit-vectors, one model
+    query per timestep and box; RobotAt/BoxAt are kept for the call signature.
+    """
+    check_result = solver.check(*assumptions)
+    if check_result == unsat:
         return None
+    if check_result != sat:
+        raise RuntimeError(f"z3 returned unknown at horizon {max_t}: {solver.reason_unknown()}")
 
     model = solver.model()
-    rows, cols = grid_size
-    path = []
-    box_paths = [[] for _ in range(num_boxes)]
-
-    for t in range(max_t + 1):
-        # Robot position
-        for r in range(rows):
-            for c in range(cols):
-                if grid[r][c] == '#':          
-                    continue
-                if model.evaluate(RobotAt[(t, r, c)], model_completion=True):
-                    path.append((r, c))
-                    break
-
-        # Box positions
-        for b_id in range(num_boxes):
-            for r in range(rows):
-                for c in range(cols):
-                    if grid[r][c] == '#':      
-                        continue
-                    if model.evaluate(BoxAt[(t, r, c, b_id)], model_completion=True):
-                        box_paths[b_id].append((r, c))
-                        break
+    free_cells = free_cells_of(grid)
+    bits = pos_bits(len(free_cells))
+
+    def cell(var):
+        return free_cells[model.evaluate(var, model_completion=True).as_long()]
+
+    path = [cell(robot_pos(t, bits)) for t in range(max_t + 1)]
+    box_paths = [[cell(box_pos(t, b, bits)) for t in range(max_t + 1)]
+                 for b in range(num_boxes)]
 
     return path, box_paths
+
+
+class IncrementalPlanner:
+    """
+    Iterative-deepening SAT planner on one solver kept alive across horizons.
+    extend_to() only adds the timesteps beyond the current horizon, and the goal
+    for a horizon is checked as an assumption, so learned clauses carry over.
+    """
+    def __init__(self, grid, start, goal, boxes, obstacles):
+        self.grid = grid
+        self.goal = goal
+        self.num_boxes = len(boxes)
+        self.enc = init_encoding(grid, start, boxes, obstacles)
+
+    @property
+    def horizon(self):
+        return self.enc['horizon']
+
+    def extend_to(self, t_new):
+        """Grow the encoding so it covers timesteps 0..t_new."""
+        while self.horizon < t_new:
+            extend_one_step(self.enc, self.horizon)
+
+    def solve(self, t):
+        """Plan that reaches the goal in exactly t moves, or None."""
+        self.extend_to(t)
+        return plan_sat(self.enc['solver'], self.enc['RobotAt'], self.enc['BoxAt'], t,
+                        (len(self.grid), len(self.grid[0])), self.num_boxes, self.grid,
+                        assumptions=[goal_literal(self.enc, self.goal, t)])
+
+    def search(self, max_t):
+        """
+        Try horizons t=1..max_t-1 in order, extending the encoding only when the
+        previous horizon was unsat. Returns (t, (path, box_paths)) for the
+        smallest satisfiable horizon, or (-1, None).
+        """
+        for t in range(1, max_t):
+            print(f"Trying SAT with horizon t={t}...")
+            sat_result = self.solve(t)
+            if sat_result:
+                return t, sat_result
+        return -1, None
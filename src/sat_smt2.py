@@ -0,0 +1,155 @@
+import os
+import numpy as np
+from sat_encoding import slide_tables, box_reachable, pos_bits
+
+# Same log-encoded transition system as sat_encoding, written straight to
+# SMT-LIB2 text. Variable names match sat_encoding (RP_t, BP_t_b, MV_t), so
+# load_sat_plan reads the result like any cached encoding.
+
+class SMT2Writer:
+    """Accumulates SMT-LIB2 commands as strings; nothing goes through the z3 API."""
+    def __init__(self):
+        self.lines = []
+
+    def declare(self, name, sort):
+        self.lines.append(f"(declare-const {name} {sort})")
+        return name
+
+    def define(self, name, body):
+        """Name a Bool subformula so later uses share it."""
+        self.lines.append(f"(define-fun {name} () Bool {body})")
+        return name
+
+    def assert_(self, expr):
+        self.lines.append(f"(assert {expr})")
+
+    def text(self):
+        return "\n".join(self.lines) + "\n"
+
+    def write(self, path):
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(self.text())
+        os.replace(tmp_path, path)
+
+def _and(terms):
+    terms = [x for x in terms if x != "true"]
+    if not terms:
+        return "true"
+    return terms[0] if len(terms) == 1 else f"(and {' '.join(terms)})"
+
+def _or(terms):
+    if not terms:
+        return "false"
+    return terms[0] if len(terms) == 1 else f"(or {' '.join(terms)})"
+
+def _at(var, i, bits):
+    return f"(= {var} (_ bv{i} {bits}))"
+
+def emit_transitions(grid, num_boxes, t_start, t_end):
+    """
+    SMT-LIB2 text for the moves t_start..t_end-1. A step only names variables
+    of t and t+1 (and the AB_/NB_ cell predicates write_smt2_plan declares).
+    """
+    free_cells, cell_id, path_len, path_ids = slide_tables(grid)
+    F = len(free_cells)
+    bits = pos_bits(F)
+    w = SMT2Writer()
+
+    for t in range(t_start, t_end):
+        w.declare(f"MV_{t}", "(_ BitVec 2)")          # the move, exactly-one by itself
+        M = [f"(= MV_{t} (_ bv{a} 2))" for a in range(4)]
+        for a in range(4):
+            origins = [_at(f"RP_{t}", i, bits) for i in np.flatnonzero(path_len[a]).tolist()]
+            w.assert_(f"(=> {M[a]} {_or(origins)})")
+
+        # clear[(i, a)][k]: no box on the first k cells of that slide
+        clear = {}
+        for i in range(F):
+            for a in range(4):
+                prefixes = ["true"]
+                for k, j in enumerate(path_ids[a, i, :path_len[a, i]].tolist()):
+                    if num_boxes:
+                        prefixes.append(w.define(f"C_{t}_{i}_{a}_{k + 1}",
+                                                 _and([prefixes[-1], f"NB_{t}_{j}"])))
+                    else:
+                        prefixes.append("true")
+                clear[(i, a)] = prefixes
+
+        pushed = [[] for _ in range(num_boxes)]
+        for i in range(F):
+            for a in range(4):
+                ids = path_ids[a, i, :path_len[a, i]].tolist()
+                here = w.define(f"MH_{t}_{i}_{a}", f"(and {_at(f'RP_{t}', i, bits)} {M[a]})")
+                if not ids:
+                    w.assert_(f"(not {here})")
+                    continue
+
+                prefixes = clear[(i, a)]
+                w.assert_(f"(=> {_and([here, prefixes[-1]])} {_at(f'RP_{t + 1}', ids[-1], bits)})")
+                if not num_boxes:
+                    continue
+
+                local_pushed = []
+                for k, j in enumerate(ids):
+                    box_clear = clear[(j, a)]          # the box's own slide is ids[k+1:]
+                    for m in range(k, len(ids)):
+                        stop = ids[m]
+                        robot_next = ids[m - 1] if m > 0 else i
+                        conds = [here, prefixes[k], box_clear[m - k]]
+                        if m + 1 < len(ids):
+                            conds.append(f"AB_{t}_{ids[m + 1]}")
+                        for b in range(num_boxes):
+                            x = w.define(f"X_{t}_{i}_{a}_{k}_{m}_{b}",
+                                         _and(conds + [_at(f"BP_{t}_{b}", j, bits)]))
+                            w.assert_(f"(=> {x} (and {_at(f'RP_{t + 1}', robot_next, bits)} "
+                                      f"{_at(f'BP_{t + 1}_{b}', stop, bits)}))")
+                            pushed[b].append(x)
+                            local_pushed.append(x)
+                w.assert_(f"(=> {here} {_or([prefixes[-1]] + local_pushed)})")
+
+        # -------- frame: a box that is not pushed stays put --------
+        for b in range(num_boxes):
+            pushed_b = w.define(f"Pushed_{t}_{b}", _or(pushed[b]))
+            w.assert_(f"(=> (not {pushed_b}) (= BP_{t + 1}_{b} BP_{t}_{b}))")
+
+    return w.text()
+
+def write_smt2_plan(grid, start, goal, boxes, obstacles, max_t):
+    """SMT2Writer holding the encoding of "reach goal in exactly max_t moves"."""
+    free_cells, cell_id, path_len, path_ids = slide_tables(grid)
+    F, num_boxes = len(free_cells), len(boxes)
+    bits = pos_bits(F)
+    box_reach = box_reachable(cell_id, path_len, path_ids, boxes)
+    w = SMT2Writer()
+
+    # -------- positions --------
+    for t in range(max_t + 1):
+        w.declare(f"RP_{t}", f"(_ BitVec {bits})")
+        for b in range(num_boxes):
+            w.declare(f"BP_{t}_{b}", f"(_ BitVec {bits})")
+        if F < 1 << bits:
+            w.assert_(f"(bvult RP_{t} (_ bv{F} {bits}))")
+            for b in range(num_boxes):
+                w.assert_(f"(bvult BP_{t}_{b} (_ bv{F} {bits}))")
+        if num_boxes > 1:
+            w.assert_(f"(distinct {' '.join(f'BP_{t}_{b}' for b in range(num_boxes))})")
+        for i, b in zip(*np.nonzero(~box_reach)):
+            w.assert_(f"(not {_at(f'BP_{t}_{b}', i, bits)})")
+        if num_boxes:
+            for i in range(F):
+                w.define(f"AB_{t}_{i}", _or([_at(f"BP_{t}_{b}", i, bits) for b in range(num_boxes)]))
+                w.define(f"NB_{t}_{i}", f"(not AB_{t}_{i})")
+
+    # -------- initial state and goal --------
+    w.assert_(_at("RP_0", cell_id[start], bits))
+    for b, cell in enumerate(boxes):
+        w.assert_(_at(f"BP_0_{b}", cell_id[cell], bits))
+    w.assert_(_at(f"RP_{max_t}", cell_id[goal], bits))
+
+    # -------- transitions --------
+    transitions = emit_transitions(grid, num_boxes, 0, max_t)
+    if transitions.strip():
+        w.lines.append(transitions.rstrip("\n"))
+
+    return w
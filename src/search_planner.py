@@ -1,34 +1,113 @@
 # search_planner.py
 from collections import deque
+import random
 import time
 from sat_encoding import encode_sat_plan  # Import the SAT encoding to reuse logic
 
+# Directions: up, down, left, right (same as in SAT encoding)
+DIRECTIONS = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+
 class State:
     """
     Represents a state in the Sokoban on Ice problem.
     """
+    # BFS keeps every state alive through all_states and the parent chains,
+    # so drop the per-instance __dict__
+    __slots__ = ('robot_pos', 'boxes', 'parent', 'action', 'depth', 'key', '_hash')
+    
     def __init__(self, robot_pos, box_positions, parent=None, action=None):
         self.robot_pos = robot_pos  # (row, col)
-        # Store boxes as a tuple for hashability
-        self.boxes = tuple(sorted(box_positions))
+        # Boxes are interchangeable, so a frozenset identifies them without
+        # sorting; reconstruct_path recovers each box's own track
+        self.boxes = box_positions if isinstance(box_positions, frozenset) else frozenset(box_positions)
         self.parent = parent  # Parent state for path reconstruction
         self.action = action  # Action that led to this state
         self.depth = 0 if parent is None else parent.depth + 1
+        # Canonical, collision-free identity of the state
+        self.key = (self.robot_pos, self.boxes)
+        # Tuples don't cache their hash, so keep it for set/dict use of States
+        self._hash = hash(self.key)
     
     def __hash__(self):
-        return hash((self.robot_pos, self.boxes))
+        return self._hash
     
     def __eq__(self, other):
-        return self.robot_pos == other.robot_pos and self.boxes == other.boxes
+        return self.key == other.key
+
+
+def obstacle_bitmasks(grid):
+    """Per-row int bitmasks: bit c of row r is set iff grid[r][c] is a wall."""
+    return [sum(1 << c for c, ch in enumerate(row) if ch == '#') for row in grid]
+
+def slide_table(rows, cols, obstacle_bits, directions):
+    """
+    ends[a][r][c]: the cell a slide from free cell (r, c) in direction a stops
+    on when there are no boxes. Built with one sweep per direction, walking
+    against it so the neighbour's entry is always ready.
+    """
+    def free(r, c):
+        return 0 <= r < rows and 0 <= c < cols and not (obstacle_bits[r] >> c) & 1
+    
+    ends = []
+    for dr, dc in directions:
+        end = [[None] * cols for _ in range(rows)]
+        row_order = range(rows - 1, -1, -1) if dr > 0 else range(rows)
+        col_order = range(cols - 1, -1, -1) if dc > 0 else range(cols)
+        for r in row_order:
+            for c in col_order:
+                if free(r, c):
+                    end[r][c] = end[r + dr][c + dc] if free(r + dr, c + dc) else (r, c)
+        ends.append(end)
+    return ends
 
+def first_box_on(r, c, dr, dc, length, boxes):
+    """Nearest box within length cells of (r, c) in direction (dr, dc), or None."""
+    hit, hit_dist = None, length + 1
+    for br, bc in boxes:
+        if (bc == c) if dc == 0 else (br == r):
+            dist = (br - r) * dr + (bc - c) * dc
+            if 0 < dist < hit_dist:
+                hit, hit_dist = (br, bc), dist
+    return hit
 
-def plan_bfs(grid, start, goal, boxes, obstacles, max_depth=50):
+def slide_robot_and_box(ends, r, c, a, boxes):
+    """
+    Simulate the robot sliding in direction a from (r, c), pushing the first
+    box in its way. The wall stop comes from the slide table ends (see
+    slide_table), so only the boxes are scanned; a pushed box stops at its own
+    wall stop or before the next box. Returns the robot's cell and the boxes,
+    rebuilt only if one was pushed.
+    
+    Module-level with everything passed in, so the hot loop reads locals
+    rather than closure cells.
+    """
+    dr, dc = DIRECTIONS[a]
+    end = ends[a]
+    er, ec = end[r][c]
+    box = first_box_on(r, c, dr, dc, (er - r) * dr + (ec - c) * dc, boxes)
+    if box is None:
+        return er, ec, boxes
+    
+    # Push that box: it stops at its own wall stop or before the next box
+    br, bc = box
+    pr, pc = end[br][bc]
+    blocker = first_box_on(br, bc, dr, dc, (pr - br) * dr + (pc - bc) * dc, boxes)
+    if blocker is not None:
+        pr, pc = blocker[0] - dr, blocker[1] - dc
+    new_boxes = boxes.difference((box,)).union(((pr, pc),))
+    # The robot stops just behind the box
+    return pr - dr, pc - dc, new_boxes
+
+def plan_bfs(grid, start, goal, boxes, obstacles, max_depth=50, obstacle_bits=None, seed=None):
     """
     Solve Sokoban on Ice using BFS search
     
+    obstacle_bits: optional per-row wall bitmasks (see obstacle_bitmasks)
+    seed:          if given, expand moves in an order shuffled by this seed
+    
     Returns:
         (robot_path, box_paths, nodes_expanded, all_states) if solution found, else None
-        where all_states is a dictionary mapping state hashes to states for visualization
+        where all_states is a dictionary mapping state keys to states for visualization
     """
     print(f"Starting BFS search from {start} to {goal} with {len(boxes)} boxes")
     start_time = time.time()
@@ -36,9 +115,17 @@ def plan_bfs(grid, start, goal, boxes, obstacles, max_depth=50):
     # Grid dimensions
     rows = len(grid)
     cols = len(grid[0]) if rows > 0 else 0
+    if obstacle_bits is None:
+        obstacle_bits = obstacle_bitmasks(grid)
     
-    # Directions: up, down, left, right (same as in SAT encoding)
-    directions = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+    # Expansion order; actions keep their index into DIRECTIONS
+    moves = list(enumerate(DIRECTIONS))
+    if seed is not None:
+        random.Random(seed).shuffle(moves)
+    
+    # Without boxes a slide can be undone, so search from both ends
+    if not boxes:
+        return plan_bfs_bidirectional(rows, cols, start, goal, max_depth, obstacle_bits, moves)
     
     # Create initial state
     initial_state = State(start, boxes)
@@ -46,72 +133,15 @@ def plan_bfs(grid, start, goal, boxes, obstacles, max_depth=50):
     # BFS queue
     queue = deque([initial_state])
     
-    # Visited states set
-    visited = set([hash(initial_state)])
-    
-    # Dictionary to store all explored states for visualization
-    # Key is state hash, value is the state object
-    all_states = {hash(initial_state): initial_state}
+    # Dictionary of all explored states, also the visited set (and used for
+    # visualization). Key is the state's canonical key, value is the state object
+    all_states = {initial_state.key: initial_state}
     
     # Count expanded nodes
     nodes_expanded = 0
     
-    # Direct implementation of slide_robot_and_box function
-    def slide_robot_and_box(r, c, dr, dc, box_positions):
-        """Simulate robot sliding with possible box pushing"""
-        nr, nc = r, c  # robot's position as it slides
-        new_bpos = dict(box_positions)  # copy so we can modify
-        
-        while True:
-            rr = nr + dr
-            cc = nc + dc
-            # If we go out of bounds or into a static obstacle, stop.
-            if not (0 <= rr < rows and 0 <= cc < cols):
-                break
-            if grid[rr][cc] == '#':
-                break
-            
-            # Check if there's a box there
-            box_id_at_next = None
-            for b_id, (bxr, bxc) in new_bpos.items():
-                if bxr == rr and bxc == cc:
-                    box_id_at_next = b_id
-                    break
-            
-            # If no box, keep sliding the robot
-            if box_id_at_next is None:
-                nr, nc = rr, cc
-                continue
-            
-            # Otherwise, try to push that box
-            push_r, push_c = rr, cc
-            while True:
-                push_r2 = push_r + dr
-                push_c2 = push_c + dc
-                # Stop if out of bounds / obstacle
-                if not (0 <= push_r2 < rows and 0 <= push_c2 < cols):
-                    break
-                if grid[push_r2][push_c2] == '#':
-                    break
-                # Stop if another box is there
-                blocked = False
-                for ob_id, (ob_r, ob_c) in new_bpos.items():
-                    if ob_id != box_id_at_next and ob_r == push_r2 and ob_c == push_c2:
-                        blocked = True
-                        break
-                if blocked:
-                    break
-                # Otherwise, keep sliding the box
-                push_r, push_c = push_r2, push_c2
-            
-            # push_r, push_c is final box position
-            new_bpos[box_id_at_next] = (push_r, push_c)
-            # The robot stops just behind the box
-            nr, nc = push_r - dr, push_c - dc
-            # Pushing done, break from main loop
-            break
-        
-        return nr, nc, list(new_bpos.values())
+    # Where each slide ends on the empty map
+    ends = slide_table(rows, cols, obstacle_bits, DIRECTIONS)
     
     # BFS main loop
     while queue:
@@ -139,28 +169,24 @@ def plan_bfs(grid, start, goal, boxes, obstacles, max_depth=50):
             continue
         
         # Try each direction
-        for a, (dr, dc) in enumerate(directions):
-            # Convert tuple to dict for slide_robot_and_box compatibility
-            box_positions = dict(enumerate(state.boxes))
-            
+        r, c = state.robot_pos
+        boxes_now = state.boxes
+        for a, _ in moves:
             # Simulate the move
             try:
-                nr, nc, new_boxes = slide_robot_and_box(
-                    state.robot_pos[0], state.robot_pos[1], 
-                    dr, dc, 
-                    box_positions
-                )
+                nr, nc, new_boxes = slide_robot_and_box(ends, r, c, a, boxes_now)
+                
+                # Check if we've seen this state before; its key is known
+                # before a State is built, so duplicates never allocate one.
+                # One lookup to test and one to store, both in all_states
+                key = ((nr, nc), new_boxes)
+                if key in all_states:
+                    continue
                 
                 # Create new state
                 new_state = State((nr, nc), new_boxes, state, a)
-                
-                # Check if we've seen this state before
-                new_hash = hash(new_state)
-                if new_hash not in visited:
-                    visited.add(new_hash)
-                    queue.append(new_state)
-                    # Store state for visualization
-                    all_states[new_hash] = new_state
+                queue.append(new_state)
+                all_states[key] = new_state
             except Exception as e:
                 print(f"Error simulating move: {e}")
                 continue
@@ -171,30 +197,204 @@ def plan_bfs(grid, start, goal, boxes, obstacles, max_depth=50):
     print(f"Time taken: {elapsed:.2f} seconds")
     return None
 
+def plan_bfs_bidirectional(rows, cols, start, goal, max_depth, obstacle_bits, moves):
+    """
+    Bidirectional BFS for maps without boxes, where the robot's cell is the
+    whole state. The forward side slides from the start; the backward side
+    steps from a cell to every cell whose slide ends there. Each round
+    expands a whole level of the smaller frontier, and the first round where
+    the frontiers meet gives a shortest path. Returns what plan_bfs returns.
+    """
+    start_time = time.time()
+    
+    def free(r, c):
+        return 0 <= r < rows and 0 <= c < cols and not (obstacle_bits[r] >> c) & 1
+    
+    def slides_from(cell):
+        r, c = cell
+        for a, (dr, dc) in moves:
+            rr, cc = r, c
+            while free(rr + dr, cc + dc):
+                rr, cc = rr + dr, cc + dc
+            yield a, (rr, cc)
+    
+    def slides_into(cell):
+        # a slide in direction a ends on cell iff the next cell is blocked;
+        # it can then start on any free cell behind it
+        r, c = cell
+        for a, (dr, dc) in moves:
+            if free(r + dr, c + dc):
+                continue
+            pr, pc = r - dr, c - dc
+            while free(pr, pc):
+                yield a, (pr, pc)
+                pr, pc = pr - dr, pc - dc
+    
+    # forward: cell -> State (parent chain back to the start)
+    # backward: cell -> (next cell towards the goal, action, moves to the goal)
+    forward = {start: State(start, ())}
+    backward = {goal: (None, None, 0)}
+    f_front, b_front = [start], [goal]
+    f_depth = b_depth = 0
+    nodes_expanded = 0
+    meet = start if start == goal else None
+    
+    while meet is None and f_front and b_front and f_depth + b_depth < max_depth:
+        nodes_expanded += min(len(f_front), len(b_front))
+        if len(f_front) <= len(b_front):
+            f_depth += 1
+            next_front = []
+            for cell in f_front:
+                for a, nxt in slides_from(cell):
+                    if nxt not in forward:
+                        forward[nxt] = State(nxt, (), forward[cell], a)
+                        next_front.append(nxt)
+            f_front = next_front
+            meets = [cell for cell in f_front if cell in backward]
+        else:
+            b_depth += 1
+            next_front = []
+            for cell in b_front:
+                for a, prev in slides_into(cell):
+                    if prev not in backward:
+                        backward[prev] = (cell, a, b_depth)
+                        next_front.append(prev)
+            b_front = next_front
+            meets = [cell for cell in b_front if cell in forward]
+        if meets:
+            meet = min(meets, key=lambda cell: forward[cell].depth + backward[cell][2])
+    
+    if meet is None:
+        elapsed = time.time() - start_time
+        print(f"No solution found after exploring {nodes_expanded} nodes")
+        print(f"Time taken: {elapsed:.2f} seconds")
+        return None
+    
+    # Splice: extend the forward parent chain along the backward links
+    all_states = {state.key: state for state in forward.values()}
+    state = forward[meet]
+    cell = meet
+    while backward[cell][0] is not None:
+        cell, a = backward[cell][0], backward[cell][1]
+        state = State(cell, (), state, a)
+        all_states.setdefault(state.key, state)
+    
+    elapsed = time.time() - start_time
+    print(f"Solution found at depth {state.depth} after exploring {nodes_expanded} nodes")
+    print(f"Time taken: {elapsed:.8f} seconds")
+    robot_path, box_paths = reconstruct_path(state)
+    return robot_path, box_paths, nodes_expanded, all_states
+
+def plan_iddfs(grid, start, goal, boxes, obstacles, max_depth=50, obstacle_bits=None,
+               max_table=None, collect_states=False):
+    """
+    Iterative-deepening DFS with a transposition table, for searches whose BFS
+    frontier gets too large to hold. Round `limit` is a DFS that stops `limit`
+    moves deep; table[key] is the most moves a state has been searched with,
+    so a state is only searched again with more moves to spare, also across
+    rounds. The first round that reaches the goal gives a shortest path.
+    
+    Only the current DFS path is held as State objects, but the table has an
+    entry per visited state, so memory is O(visited states) like BFS unless
+    max_table caps it. Once the table is full new states are not recorded and
+    may be searched again, which costs time but not correctness. Shallower
+    rounds are re-expanded each round, so expect more nodes than plan_bfs.
+    
+    Returns:
+        (robot_path, box_paths, nodes_expanded), or the plan_bfs 4-tuple with
+        the last round's states as all_states when collect_states is set (the
+        search tree visualizer needs them; they cost BFS-sized memory)
+    """
+    print(f"Starting IDDFS search from {start} to {goal} with {len(boxes)} boxes")
+    start_time = time.time()
+    
+    rows = len(grid)
+    cols = len(grid[0]) if rows > 0 else 0
+    if obstacle_bits is None:
+        obstacle_bits = obstacle_bitmasks(grid)
+    ends = slide_table(rows, cols, obstacle_bits, DIRECTIONS)
+    
+    initial_state = State(start, boxes)
+    table = {initial_state.key: 0}
+    nodes_expanded = 0
+    all_states = {} if collect_states else None
+    
+    def dfs(state, remaining):
+        nonlocal nodes_expanded
+        nodes_expanded += 1
+        r, c = state.robot_pos
+        for a in range(4):
+            nr, nc, new_boxes = slide_robot_and_box(ends, r, c, a, state.boxes)
+            key = ((nr, nc), new_boxes)
+            if (nr, nc) != goal and table.get(key, -1) >= remaining - 1:
+                continue
+            child = State((nr, nc), new_boxes, state, a)
+            if collect_states:
+                all_states.setdefault(key, child)
+            if (nr, nc) == goal:
+                return child
+            if max_table is None or key in table or len(table) < max_table:
+                table[key] = remaining - 1
+            if remaining > 1:
+                found = dfs(child, remaining - 1)
+                if found:
+                    return found
+        return None
+    
+    goal_state = initial_state if start == goal else None
+    limit = 0
+    while goal_state is None and limit < max_depth:
+        limit += 1
+        if collect_states:
+            all_states = {initial_state.key: initial_state}
+        table[initial_state.key] = limit
+        goal_state = dfs(initial_state, limit)
+    
+    elapsed = time.time() - start_time
+    if goal_state is None:
+        print(f"No solution found after exploring {nodes_expanded} nodes")
+        print(f"Time taken: {elapsed:.2f} seconds")
+        return None
+    
+    print(f"Solution found at depth {goal_state.depth} after exploring {nodes_expanded} nodes")
+    print(f"Time taken: {elapsed:.8f} seconds")
+    robot_path, box_paths = reconstruct_path(goal_state)
+    if collect_states:
+        return robot_path, box_paths, nodes_expanded, all_states
+    return robot_path, box_paths, nodes_expanded
+
+def plan_bfs_seeded(grid, start, goal, boxes, obstacles, max_depth, obstacle_bits, seed):
+    """Portfolio task: plan_bfs with a seeded move order."""
+    return plan_bfs(grid, start, goal, boxes, obstacles, max_depth=max_depth,
+                    obstacle_bits=obstacle_bits, seed=seed)
+
 def reconstruct_path(final_state):
     """Reconstruct the path from initial state to final state"""
-    # Collect states from goal to start
-    states = []
+    if final_state is None:
+        return [], []
+    
+    # Walk the parent chain once, writing each state at its depth, so the
+    # states come out start-to-goal without a reverse
+    num_states = final_state.depth + 1
+    states = [None] * num_states
     current = final_state
-    while current:
-        states.append(current)
+    for i in range(num_states - 1, -1, -1):
+        states[i] = current
         current = current.parent
     
-    # Reverse to get start to goal
-    states.reverse()
-    
     # Extract robot path
     robot_path = [state.robot_pos for state in states]
     
-    # Extract box paths
-    if not states:
-        return [], []
-    
-    num_boxes = len(states[0].boxes)
-    box_paths = [[] for _ in range(num_boxes)]
-    
-    for state in states:
-        for b_id, pos in enumerate(state.boxes):
-            box_paths[b_id].append(pos)
+    # States only hold the set of box cells; a step moves at most one box,
+    # from the cell that left the set to the one that joined it
+    box_paths = [[pos] * num_states for pos in sorted(states[0].boxes)]
+    for t in range(1, num_states):
+        prev, state = states[t - 1], states[t]
+        if prev.boxes is state.boxes:
+            moved = {}
+        else:
+            moved = dict(zip(prev.boxes - state.boxes, state.boxes - prev.boxes))
+        for path in box_paths:
+            path[t] = moved.get(path[t - 1], path[t - 1])
     
-    return robot_path, box_paths
\ No newline at end of file
+    return robot_path, box_paths
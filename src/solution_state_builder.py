@@ -10,13 +10,18 @@ def build_solution_states(robot_path, box_paths, grid):
     prev_state = None
     all_states = []
     
-    for i in range(len(robot_path)):
-        # Get robot and box positions at this step
-        robot_pos = robot_path[i]
-        boxes = []
-        for box_path in box_paths:
-            if i < len(box_path):
-                boxes.append(box_path[i])
+    # Per-step box positions: a transpose of box_paths. The planners give every
+    # box a full-length path, so zip does it; a shorter path just drops out of
+    # the later steps
+    lengths = set(map(len, box_paths))
+    longest = max(lengths, default=0)
+    if len(lengths) <= 1:
+        step_boxes = list(zip(*box_paths))
+    else:
+        step_boxes = [[path[i] for path in box_paths if i < len(path)] for i in range(longest)]
+    
+    for i, robot_pos in enumerate(robot_path):
+        boxes = step_boxes[i] if i < longest else ()
         
         # Create state
         state = State(robot_pos, boxes, prev_state)
@@ -1,5 +1,14 @@
+import numpy as np
 from PIL import Image
 
+# Cell colours by code: free (and anything unlisted) white, obstacle black,
+# goal green, start gray, box blue, robot red. Frames are built as these codes
+# and saved as palette images, so the GIF writer has nothing to quantize.
+PALETTE = np.array([(255, 255, 255), (0, 0, 0), (0, 255, 0), (200, 200, 200),
+                    (0, 0, 255), (255, 0, 0)], dtype=np.uint8)
+CELL_CODE = {'#': 1, 'G': 2, 'S': 3}
+BOX_CODE, ROBOT_CODE = 4, 5
+
 def visualize_path_sat(grid, path, box_paths=None, scale=20):
     """
     Visualizes the robot path and box motions.
@@ -25,47 +34,52 @@ def visualize_path_sat(grid, path, box_paths=None, scale=20):
         print("".join(row))
     print("----------------------------------\n")
 
-    def char_to_color(ch):
-        if ch == '#': return (0, 0, 0)       # obstacle -> black
-        elif ch == 'G': return (0, 255, 0)   # goal -> green
-        elif ch == 'S': return (200, 200, 200)  # start -> gray
-        elif ch == '.': return (255, 255, 255)  # free -> white
-        return (255, 255, 255)
+    # Static background as palette codes
+    background = np.array([[CELL_CODE.get(ch, 0) for ch in row] for row in grid], dtype=np.uint8)
+    rows, cols = background.shape
+    palette = PALETTE.ravel().tolist()
 
-    def grid_to_image(current_grid, robot_pos=None, box_pos_list=None):
-        rows = len(current_grid)
-        cols = len(current_grid[0]) if rows > 0 else 0
-        base_img = Image.new('RGB', (cols, rows))
-        pixels = base_img.load()
+    # One frame buffer for the whole animation: each frame first restores the
+    # few cells the previous one painted, then paints its own. The resize
+    # makes a new image, so earlier frames don't see later edits.
+    pixels = background.copy()
+    painted = []
 
-        for r in range(rows):
-            for c in range(cols):
-                pixels[c, r] = char_to_color(current_grid[r][c])
+    def grid_to_image(robot_pos=None, box_pos_list=None):
+        for (r, c) in painted:
+            pixels[r, c] = background[r, c]
+        painted.clear()
 
         if box_pos_list:
             for (br, bc) in box_pos_list:
                 if 0 <= br < rows and 0 <= bc < cols:
-                    pixels[bc, br] = (0, 0, 255)  # box -> blue
+                    pixels[br, bc] = BOX_CODE
+                    painted.append((br, bc))
 
         if robot_pos:
             rr, cc = robot_pos
             if 0 <= rr < rows and 0 <= cc < cols:
-                pixels[cc, rr] = (255, 0, 0)  # robot -> red
+                pixels[rr, cc] = ROBOT_CODE
+                painted.append((rr, cc))
 
-        return base_img.resize((cols * scale, rows * scale), Image.NEAREST)
+        img = Image.fromarray(pixels)
+        img.putpalette(palette)                  # 'L' codes -> 'P' image
+        # Upscale with PIL's NEAREST resize, which is faster here than
+        # np.repeat / broadcast_to
+        return img.resize((cols * scale, rows * scale), Image.NEAREST)
 
     # --- Generate animation frames ---
-    frames = []
-    num_frames = len(path)
-    for t in range(num_frames):
-        robot_here = path[t]
-        box_positions = []
-        if box_paths:
-            for b_path in box_paths:
-                if t < len(b_path):
-                    box_positions.append(b_path[t])
-        img = grid_to_image(grid, robot_here, box_positions)
-        frames.append(img)
+    # Lazily, so the GIF writer pulls one palette frame at a time instead of
+    # the whole animation sitting in a list
+    def generate_frames():
+        for t in range(len(path)):
+            robot_here = path[t]
+            box_positions = []
+            if box_paths:
+                for b_path in box_paths:
+                    if t < len(b_path):
+                        box_positions.append(b_path[t])
+            yield grid_to_image(robot_here, box_positions)
 
     # Extract final robot and box positions
     final_robot = path[-1]
@@ -75,15 +89,16 @@ def visualize_path_sat(grid, path, box_paths=None, scale=20):
             if len(b) > 0:
                 final_boxes.append(b[-1])
 
-    final_image = grid_to_image(grid, final_robot, final_boxes)
+    final_image = grid_to_image(final_robot, final_boxes)
     #final_image.save("path_sat.png")
 
     print(f"Saved final path image (scaled by {scale}) as path.png")
 
-    frames[0].save(
+    frames = generate_frames()
+    next(frames).save(
         "path_sat.gif",
         save_all=True,
-        append_images=frames[1:],
+        append_images=frames,
         duration=300,
         loop=0
     )
@@ -0,0 +1,199 @@
+"""
+Cross-checks for the planners. The Z3, DIMACS and SMT-LIB2 encodings and the
+BFS, bidirectional BFS and IDDFS searches all model the same sliding rules, so
+on every map they must agree on the shortest plan length, and every plan they
+return must replay move by move under those rules.
+
+Run from the repository root:  python -m unittest discover -s tests
+"""
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import numpy as np
+from compare_planners import find_positions, load_map_array, grid_to_lists
+from sat_cnf import plan_sat_cnf
+from sat_encoding import encode_sat_plan, load_sat_plan
+from sat_planner import plan_sat, IncrementalPlanner
+from sat_smt2 import write_smt2_plan
+from search_planner import DIRECTIONS, plan_bfs, plan_bfs_bidirectional, plan_iddfs
+
+MAPS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'maps')
+MAX_T = 12
+
+# name -> (map text or shipped map file, shortest plan length in moves or None)
+MAPS = {
+    'no_boxes': ("""\
+########
+###..#G#
+#....#.#
+##S#...#
+##.....#
+#..##..#
+########""", 5),
+    'one_box': ("""\
+########
+#.S..G.#
+##.##..#
+#.B....#
+#...#..#
+#......#
+########""", 5),          # unsolvable without using the box
+    'two_boxes': ("""\
+########
+##...B.#
+#......#
+##...S.#
+#.#..GB#
+##.#...#
+########""", 5),          # likewise
+    'unsolvable': ("""\
+######
+#S.#G#
+#..#.#
+######""", None),
+    'icepath': ('icepath.txt', 10),
+    'scene1': ('scene1.txt', 7),
+}
+
+def load(spec):
+    """(grid, start, goal, boxes, obstacles, obstacle_bits) for a map text or shipped map file."""
+    if spec.endswith('.txt'):
+        arr = load_map_array(os.path.join(MAPS_DIR, spec))
+    else:
+        arr = np.array([list(row.encode()) for row in spec.splitlines()], dtype=np.uint8)
+    start, goal, obstacles, boxes, obstacle_bits = find_positions(arr)
+    return grid_to_lists(arr), start, goal, boxes, obstacles, obstacle_bits
+
+def slide(grid, pos, d, boxes):
+    """Reference move: the robot slides until a wall, pushing the first box it meets."""
+    (r, c), (dr, dc) = pos, d
+    boxes = set(boxes)
+    while True:
+        nr, nc = r + dr, c + dc
+        if grid[nr][nc] == '#':
+            return (r, c), boxes
+        if (nr, nc) in boxes:
+            br, bc = nr, nc
+            while grid[br + dr][bc + dc] != '#' and (br + dr, bc + dc) not in boxes:
+                br, bc = br + dr, bc + dc
+            boxes = (boxes - {(nr, nc)}) | {(br, bc)}
+            return (br - dr, bc - dc), boxes
+        r, c = nr, nc
+
+def quiet(fn, *args, **kwargs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return fn(*args, **kwargs)
+
+def first_horizon(solve):
+    """Smallest t in 1..MAX_T-1 with a plan, as (t, plan), or (None, None)."""
+    for t in range(1, MAX_T):
+        plan = solve(t)
+        if plan:
+            return t, plan
+    return None, None
+
+
+class PlannersAgreeTest(unittest.TestCase):
+
+    def assertPlan(self, name, moves, plan):
+        """plan is (path, box_paths, ...) of `moves` moves that replays on map `name`."""
+        grid, start, goal, boxes, _, _ = load(MAPS[name][0])
+        path, box_paths = plan[0], plan[1]
+        self.assertEqual(len(path) - 1, moves)
+        self.assertEqual((path[0], path[-1]), (start, goal))
+        current = set(boxes)
+        for t in range(moves):
+            step_boxes = {bp[t + 1] for bp in box_paths}
+            successors = [slide(grid, path[t], d, current) for d in DIRECTIONS]
+            self.assertIn((path[t + 1], step_boxes), successors, f"illegal move {t}")
+            current = step_boxes
+
+    def check(self, solve):
+        """solve(name, map) -> (moves, plan) must match MAPS on every map."""
+        for name, (spec, expected) in MAPS.items():
+            with self.subTest(map=name):
+                moves, plan = solve(name, load(spec))
+                self.assertEqual(moves, expected)
+                if expected is not None:
+                    self.assertPlan(name, moves, plan)
+
+    def search(self, planner, **kwargs):
+        def solve(name, m):
+            grid, start, goal, boxes, obstacles, obstacle_bits = m
+            plan = quiet(planner, grid, start, goal, boxes, obstacles, max_depth=MAX_T,
+                         obstacle_bits=obstacle_bits, **kwargs)
+            return (len(plan[0]) - 1, plan) if plan else (None, None)
+        self.check(solve)
+
+    def test_bfs(self):
+        self.search(plan_bfs)
+
+    def test_bfs_seeded(self):
+        # the portfolio's move orders must not change the plan length
+        for seed in range(3):
+            self.search(plan_bfs, seed=seed)
+
+    def test_iddfs(self):
+        self.search(plan_iddfs)
+
+    def test_iddfs_bounded_table(self):
+        self.search(plan_iddfs, max_table=16)
+
+    def test_bidirectional_bfs(self):
+        # plan_bfs only takes this path without boxes, so call it directly
+        for name, (spec, expected) in MAPS.items():
+            grid, start, goal, boxes, _, obstacle_bits = load(spec)
+            if boxes:
+                continue
+            with self.subTest(map=name):
+                plan = quiet(plan_bfs_bidirectional, len(grid), len(grid[0]), start, goal,
+                             MAX_T, obstacle_bits, list(enumerate(DIRECTIONS)))
+                self.assertEqual(plan and len(plan[0]) - 1, expected)
+                if plan:
+                    self.assertPlan(name, expected, plan)
+
+    def test_sat_incremental(self):
+        def solve(name, m):
+            grid, start, goal, boxes, obstacles, _ = m
+            t, plan = quiet(IncrementalPlanner(grid, start, goal, boxes, obstacles).search, MAX_T)
+            return (t, plan) if plan else (None, None)
+        self.check(solve)
+
+    def test_sat_one_shot(self):
+        def solve(name, m):
+            grid, start, goal, boxes, obstacles, _ = m
+            def at(t):
+                solver, RobotAt, BoxAt = encode_sat_plan(grid, start, goal, boxes, obstacles, t)
+                return plan_sat(solver, RobotAt, BoxAt, t, (len(grid), len(grid[0])),
+                                len(boxes), grid)
+            return first_horizon(at)
+        self.check(solve)
+
+    def test_sat_smt2(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            def solve(name, m):
+                grid, start, goal, boxes, obstacles, _ = m
+                def at(t):
+                    path = os.path.join(tmp, f"{name}_{t}.smt2")
+                    write_smt2_plan(grid, start, goal, boxes, obstacles, t).write(path)
+                    solver, RobotAt, BoxAt = load_sat_plan(path, grid, len(boxes), t)
+                    return plan_sat(solver, RobotAt, BoxAt, t, (len(grid), len(grid[0])),
+                                    len(boxes), grid)
+                return first_horizon(at)
+            self.check(solve)
+
+    def test_sat_cnf(self):
+        def solve(name, m):
+            grid, start, goal, boxes, _, _ = m
+            return first_horizon(lambda t: plan_sat_cnf(grid, start, goal, boxes, t))
+        self.check(solve)
+
+
+if __name__ == '__main__':
+    unittest.main()